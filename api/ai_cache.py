@@ -0,0 +1,127 @@
+# api/ai_cache.py — bounded TTL/LRU memoization for AI responses
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    With `db_path` set, entries are written through to a SQLite table so
+    they survive restarts; a memory miss falls back to the table. The table
+    is created on first use, so constructing a cache touches no files.
+    """
+
+    def __init__(self, maxsize=2048, ttl=86400, db_path=None, table="ai_cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_path = db_path
+        self._table = table
+        self._table_ready = False
+
+    def _db(self):
+        db = sqlite3.connect(self._db_path, timeout=5)
+        if not self._table_ready:
+            with db:
+                db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self._table} "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+                )
+            self._table_ready = True
+        return db
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        value = self._load(key, now) if self._db_path else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store_locked(key, value, expires)
+        if self._db_path:
+            try:
+                with self._db() as db:
+                    db.execute(
+                        f"INSERT OR REPLACE INTO {self._table} (key, value, expires) VALUES (?, ?, ?)",
+                        (key, value, expires),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def _store_locked(self, key, value, expires):
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key, now):
+        try:
+            with self._db() as db:
+                row = db.execute(
+                    f"SELECT value, expires FROM {self._table} WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row or row[1] <= now:
+            return None
+        with self._lock:
+            self._store_locked(key, row[0], row[1])
+        return row[0]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self._db_path:
+            try:
+                with self._db() as db:
+                    db.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self._db_path:
+            with self._db() as db:
+                db.execute(f"DELETE FROM {self._table}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def prompt_key(model_name, prompt):
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{model_name}\x00{normalized}".encode()).hexdigest()
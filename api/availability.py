@@ -0,0 +1,160 @@
+# api/availability.py — per-property booking calendars with O(log n) overlap checks
+import threading
+from bisect import bisect_right
+from datetime import date, datetime
+
+from api.ai_cache import TTLCache
+
+MAX_NIGHTS = 365
+
+
+def today_utc():
+    """The one clock for stay dates: UTC, like every stored timestamp."""
+    return datetime.utcnow().date()
+
+
+def parse_stay(check_in, check_out=None, nights=None, today=None):
+    """(check_in, check_out) dates from ISO strings, or check_in + nights.
+
+    Raises ValueError for malformed, past, empty or over-long stays.
+    """
+    start = date.fromisoformat(str(check_in))
+    if check_out is not None:
+        end = date.fromisoformat(str(check_out))
+    else:
+        end = date.fromordinal(start.toordinal() + int(nights if nights is not None else 1))
+    if start < (today or today_utc()):
+        raise ValueError("check_in is in the past")
+    if not 1 <= (end - start).days <= MAX_NIGHTS:
+        raise ValueError(f"a stay is 1-{MAX_NIGHTS} nights")
+    return start, end
+
+
+class Calendar:
+    """Booked stays of one property as sorted [start, end) day-ordinal ranges.
+
+    Stays never overlap (reserve-or-reject keeps it that way), so the end
+    days are sorted too: the only stay that can clash with [start, end) is
+    the first one ending after `start`, found by bisection.
+    """
+
+    def __init__(self, stays=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(stays):
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def conflicts(self, start, end):
+        i = bisect_right(self.ends, start)
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start, end):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def remove(self, start, end):
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.starts[i] == start and self.ends[i] == end:
+            del self.starts[i]
+            del self.ends[i]
+
+    def booked(self, start, end):
+        """Stays overlapping [start, end), in order."""
+        i = bisect_right(self.ends, start)
+        stays = []
+        while i < len(self.starts) and self.starts[i] < end:
+            stays.append((self.starts[i], self.ends[i]))
+            i += 1
+        return stays
+
+
+class AvailabilityEngine:
+    """Reserve-or-reject bookings and answer availability from memory.
+
+    Each property's calendar is loaded from the store on first use and kept
+    for `ttl` seconds (other workers' bookings show up once it reloads).
+    Reads never wait on a write. Reservations take a per-property lock, so
+    different properties book in parallel. The store repeats the overlap
+    check inside its write transaction, and that check is what makes a
+    reservation atomic across workers. A clash found in the calendar is
+    confirmed with one indexed query before the guest is turned away: the
+    cached calendar may still hold a stay another worker has since
+    cancelled, and then it is reloaded.
+    """
+
+    def __init__(self, store, ttl=30, maxsize=10000):
+        self.store = store
+        self.reserved = 0
+        self.rejected = 0
+        self._calendars = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, property_id):
+        with self._locks_guard:
+            lock = self._locks.get(property_id)
+            if lock is None:
+                lock = self._locks[property_id] = threading.Lock()
+            return lock
+
+    def calendar(self, property_id):
+        cal = self._calendars.get(property_id)
+        if cal is None:
+            stays = self.store.stays_for_property(property_id)
+            cal = Calendar((date.fromisoformat(a).toordinal(), date.fromisoformat(b).toordinal()) for a, b in stays)
+            self._calendars.set(property_id, cal)
+        return cal
+
+    def is_available(self, property_id, start, end):
+        return not self.calendar(property_id).conflicts(start.toordinal(), end.toordinal())
+
+    def bulk(self, property_ids, start, end):
+        """{property_id: available} for a search results page."""
+        a, b = start.toordinal(), end.toordinal()
+        return {pid: not self.calendar(pid).conflicts(a, b) for pid in property_ids}
+
+    def booked(self, property_id, start, end):
+        """Booked [check_in, check_out) ISO date pairs overlapping the window."""
+        return [(date.fromordinal(a).isoformat(), date.fromordinal(b).isoformat())
+                for a, b in self.calendar(property_id).booked(start.toordinal(), end.toordinal())]
+
+    def reserve(self, user_id, prop, start, end):
+        """Book [start, end) for the user, or return None if any night is taken."""
+        a, b = start.toordinal(), end.toordinal()
+        nights = b - a
+        with self._lock(prop["id"]):
+            cal = self.calendar(prop["id"])
+            if cal.conflicts(a, b) and not self.store.stay_taken(prop["id"], start.isoformat(), end.isoformat()):
+                self._calendars.delete(prop["id"])  # stale: the clashing stay was cancelled
+                cal = self.calendar(prop["id"])
+            booking = None
+            if not cal.conflicts(a, b):
+                booking = self.store.add_booking(
+                    user_id, prop, nights, check_in=start.isoformat(), check_out=end.isoformat(),
+                )
+            if booking is None:
+                if not cal.conflicts(a, b):  # booked by another worker
+                    self._calendars.delete(prop["id"])
+                self.rejected += 1
+                return None
+            cal.add(a, b)
+            self.reserved += 1
+            return booking
+
+    def release(self, booking):
+        """Free a cancelled booking's nights."""
+        if not booking.get("check_in"):
+            return
+        with self._lock(booking["property_id"]):
+            cal = self._calendars.get(booking["property_id"])
+            if cal is not None:
+                cal.remove(date.fromisoformat(booking["check_in"]).toordinal(),
+                           date.fromisoformat(booking["check_out"]).toordinal())
+
+    def stats(self):
+        return {"reserved": self.reserved, "rejected": self.rejected, "calendars": self._calendars.stats()}
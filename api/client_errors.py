@@ -0,0 +1,246 @@
+# api/client_errors.py — browser error reports: dedupe, rate-limit, batch to SQLite
+import hashlib
+import random
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS client_error_groups (
+    fingerprint TEXT NOT NULL,
+    version     TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    message     TEXT NOT NULL,
+    count       INTEGER NOT NULL,
+    first_seen  REAL NOT NULL,
+    last_seen   REAL NOT NULL,
+    PRIMARY KEY (fingerprint, version)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS client_error_samples (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    version     TEXT NOT NULL,
+    message     TEXT NOT NULL,
+    stack       TEXT,
+    url         TEXT,
+    user_agent  TEXT,
+    reported_at TEXT,
+    received_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_client_error_samples_fp ON client_error_samples(fingerprint, id);
+"""
+
+UPSERT_GROUP = (
+    "INSERT INTO client_error_groups (fingerprint, version, type, message, count, first_seen, last_seen) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(fingerprint, version) DO UPDATE SET "
+    "count = count + excluded.count, last_seen = MAX(last_seen, excluded.last_seen)"
+)
+
+# Field caps: a report is at most a few KB however large the browser's stack is
+LIMITS = {"type": 64, "message": 1000, "stack": 4000, "url": 500, "userAgent": 300, "timestamp": 40, "version": 40}
+
+VOLATILE_RE = re.compile(r"0x[0-9a-f]+|[0-9a-f]{8,}|\d+", re.IGNORECASE)
+QUERY_RE = re.compile(r"[?#][^\s)]*")
+
+
+def _clip(report, field):
+    value = report.get(field)
+    return str(value)[:LIMITS[field]] if value is not None else ""
+
+
+def fingerprint(error_type, message, stack):
+    """Group key: the error type, its message with numbers/ids masked, and the top stack frame."""
+    top_frame = next((line.strip() for line in stack.splitlines() if line.strip()), "")
+    top_frame = QUERY_RE.sub("", top_frame)
+    raw = "\x00".join((error_type, VOLATILE_RE.sub("N", message), top_frame))
+    return hashlib.sha1(raw.encode("utf-8", "replace")).hexdigest()[:16]
+
+
+class ErrorCollector:
+    """Accepts client error reports in O(1) and writes them in batches.
+
+    Every report is counted (per fingerprint and app version) in memory.
+    Full samples — stack, url, user agent — are kept only while the
+    fingerprint's token bucket allows (`burst`, refilled at `per_second`),
+    then at `sample_rate`, and only while the bounded queue has room.
+    A background loop flushes counts and samples in one transaction.
+    """
+
+    def __init__(self, db, max_queue=10000, flush_interval=2.0, burst=5, per_second=0.1,
+                 sample_rate=1.0, keep_samples=50000):
+        self.db = db
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.burst = burst
+        self.per_second = per_second
+        self.sample_rate = sample_rate
+        self.keep_samples = keep_samples
+        self.received = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.flushed = 0
+        self._counts = {}    # (fingerprint, version) -> [type, message, count, first_seen, last_seen]
+        self._samples = deque()
+        self._buckets = {}   # fingerprint -> [tokens, updated_at]
+        self._lock = threading.Lock()
+        self._started = False
+
+    def init_schema(self):
+        self.db.executescript(SCHEMA)
+
+    def ingest(self, report):
+        """Record one report; returns 'sampled', 'counted' or 'dropped'."""
+        error_type = _clip(report, "type") or "error"
+        message = _clip(report, "message")
+        stack = _clip(report, "stack")
+        version = _clip(report, "version")
+        fp = fingerprint(error_type, message, stack)
+        now = time.time()
+
+        with self._lock:
+            self.received += 1
+            entry = self._counts.get((fp, version))
+            if entry is None:
+                self._counts[(fp, version)] = [error_type, message, 1, now, now]
+            else:
+                entry[2] += 1
+                entry[4] = now
+
+            if not self._take_token(fp, now) or random.random() >= self.sample_rate:
+                self.sampled_out += 1
+                return "counted"
+            if len(self._samples) >= self.max_queue:
+                self.dropped += 1
+                return "dropped"
+            self._samples.append((
+                fp, version, message, stack, _clip(report, "url"),
+                _clip(report, "userAgent"), _clip(report, "timestamp"), now,
+            ))
+        return "sampled"
+
+    def _take_token(self, fp, now):
+        bucket = self._buckets.get(fp)
+        if bucket is None:
+            if len(self._buckets) >= self.max_queue:
+                self._buckets.clear()  # storm of distinct errors: start over rather than grow
+            bucket = self._buckets[fp] = [float(self.burst), now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def flush(self):
+        """Write pending counts and samples; returns the number of samples written."""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            samples, self._samples = self._samples, deque()
+        if not counts and not samples:
+            return 0
+        try:
+            with self.db.transaction() as conn:
+                conn.executemany(UPSERT_GROUP, [
+                    (fp, version, t, message, n, first, last)
+                    for (fp, version), (t, message, n, first, last) in counts.items()
+                ])
+                conn.executemany(
+                    "INSERT INTO client_error_samples (fingerprint, version, message, stack, url, "
+                    "user_agent, reported_at, received_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    samples,
+                )
+                conn.execute(
+                    "DELETE FROM client_error_samples WHERE id <= "
+                    "(SELECT MAX(id) FROM client_error_samples) - ?", (self.keep_samples,)
+                )
+        except Exception:
+            traceback.print_exc()
+            with self._lock:
+                self._merge_back(counts, samples)
+            return 0
+        self.flushed += len(samples)
+        return len(samples)
+
+    def _merge_back(self, counts, samples):
+        for key, (t, message, n, first, last) in counts.items():
+            entry = self._counts.get(key)
+            if entry is None:
+                self._counts[key] = [t, message, n, first, last]
+            else:
+                entry[2] += n
+                entry[3] = min(entry[3], first)
+        room = self.max_queue - len(self._samples)
+        self._samples.extendleft(reversed(list(samples)[:max(room, 0)]))
+
+    def start(self, spawn, sleep):
+        """Begin flushing with the given spawn/sleep (socketio.start_background_task/sleep)."""
+        if self._started:
+            return
+        self._started = True
+
+        def loop():
+            while True:
+                sleep(self.flush_interval)
+                self.flush()
+
+        spawn(loop)
+
+    def top(self, limit=20, version=None, since=None):
+        """Most frequent error groups, with per-version counts and a recent sample."""
+        where, params = [], []
+        if version:
+            where.append("version = ?")
+            params.append(version)
+        if since:
+            where.append("last_seen >= ?")
+            params.append(since)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        rows = self.db.query(
+            f"SELECT fingerprint, version, type, message, count, first_seen, last_seen "
+            f"FROM client_error_groups {clause}", params,
+        )
+
+        groups = {}
+        for r in rows:
+            group = groups.get(r["fingerprint"])
+            if group is None:
+                group = groups[r["fingerprint"]] = {
+                    "fingerprint": r["fingerprint"],
+                    "type": r["type"],
+                    "message": r["message"],
+                    "count": 0,
+                    "versions": {},
+                    "first_seen": r["first_seen"],
+                    "last_seen": r["last_seen"],
+                }
+            group["count"] += r["count"]
+            group["versions"][r["version"]] = group["versions"].get(r["version"], 0) + r["count"]
+            group["first_seen"] = min(group["first_seen"], r["first_seen"])
+            group["last_seen"] = max(group["last_seen"], r["last_seen"])
+
+        ranked = sorted(groups.values(), key=lambda g: -g["count"])[:limit]
+        for group in ranked:
+            for field in ("first_seen", "last_seen"):
+                group[field] = datetime.utcfromtimestamp(group[field]).isoformat()
+            group["sample"] = self.db.query_one(
+                "SELECT url, stack, user_agent, reported_at FROM client_error_samples "
+                "WHERE fingerprint = ? ORDER BY id DESC LIMIT 1", (group["fingerprint"],),
+            )
+        return ranked
+
+    def stats(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "sampled_out": self.sampled_out,
+                "dropped": self.dropped,
+                "flushed": self.flushed,
+                "queued": len(self._samples),
+                "pending_groups": len(self._counts),
+            }
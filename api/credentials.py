@@ -0,0 +1,77 @@
+# api/credentials.py — scrypt password hashing, run in the dedicated hash pool
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+
+from api.workers import hash_pool
+
+# Current parameters; hashes made with weaker ones are upgraded on login
+SCRYPT_N = int(os.getenv("SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.getenv("SCRYPT_R", 8))
+SCRYPT_P = int(os.getenv("SCRYPT_P", 1))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode()
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, dklen=KEY_BYTES, maxmem=256 * n * r + 2 ** 20
+    )
+
+
+def _hash(password):
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+
+
+def _verify(password, stored):
+    """(matches, needs_rehash) for a stored hash or a legacy plaintext password."""
+    if not stored.startswith("scrypt$"):
+        return hmac.compare_digest(password.encode(), stored.encode()), True
+    try:
+        _, n, r, p, salt, key = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        expected = base64.b64decode(key)
+        actual = _scrypt(password, base64.b64decode(salt), n, r, p)
+    except ValueError:
+        return False, False
+    ok = hmac.compare_digest(actual, expected)
+    return ok, ok and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+# Verified against when the email is unknown, so both paths cost one KDF.
+# Made on first use: importing this module runs no KDF.
+_dummy = None
+_dummy_lock = threading.Lock()
+
+
+def _dummy_hash():
+    global _dummy
+    if _dummy is None:
+        with _dummy_lock:
+            if _dummy is None:
+                _dummy = _hash(secrets.token_urlsafe(16))
+    return _dummy
+
+
+def hash_password(password):
+    return hash_pool.call(lambda: _hash(password))
+
+
+def verify_password(password, stored):
+    """Check `password` in the hash pool; `stored` None means no such user.
+
+    Returns (matches, needs_rehash). May raise PoolOverloaded.
+    """
+    if stored is None:
+        hash_pool.call(lambda: _verify(password, _dummy_hash()))
+        return False, False
+    return hash_pool.call(lambda: _verify(password, stored))
@@ -0,0 +1,106 @@
+# api/db.py — pooled SQLite connections (WAL) for the data store
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The database file the rebuilder creates for the fixed deployment
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "ai-cohost-fixed" / "backend" / "db" / "data.sqlite3"
+
+
+def database_path():
+    return os.getenv("DATABASE_PATH") or str(DEFAULT_PATH)
+
+
+class Database:
+    """Fixed-size pool of SQLite connections.
+
+    Connections run in WAL mode so readers never block the single writer
+    and several processes can share the file. Each connection keeps a
+    statement cache, so the constant SQL strings used by the store are
+    compiled once and then reused as prepared statements.
+    """
+
+    def __init__(self, path, pool_size=8, busy_timeout=5000):
+        self.path = path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout / 1000,
+            isolation_level=None,  # autocommit; transaction() issues BEGIN itself
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._created < self.pool_size
+                if grow:
+                    self._created += 1
+            conn = self._connect() if grow else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def query_one(self, sql, params=()):
+        with self.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def execute(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params)
+
+    def executescript(self, script):
+        with self.connection() as conn:
+            conn.executescript(script)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
@@ -0,0 +1,128 @@
+# api/gemini.py — shared Gemini access for every AI endpoint
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from api.ai_cache import TTLCache, prompt_key
+from api.metrics import gemini_failures, gemini_latency
+from api.singleflight import SingleFlight
+from api.workers import ai_pool
+
+load_dotenv()
+
+response_cache = TTLCache(
+    maxsize=int(os.getenv("AI_CACHE_SIZE", 2048)),
+    ttl=float(os.getenv("AI_CACHE_TTL", 86400)),
+    db_path=os.getenv("AI_CACHE_DB") or None,
+)
+
+# Identical prompts in flight at the same time share one model call
+flights = SingleFlight()
+
+_genai = None
+_models = {}
+_models_lock = threading.Lock()
+
+
+def client():
+    """The configured google.generativeai module, imported on first use.
+
+    The SDK (and the gRPC stack under it) takes most of a second to import,
+    so the server starts and answers health checks without it.
+    """
+    global _genai
+    if _genai is None:
+        with _models_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _genai = genai
+    return _genai
+
+
+def loaded():
+    return _genai is not None
+
+
+def preload():
+    """Import the SDK in the AI pool (off the event loop) ahead of the first request."""
+    try:
+        ai_pool.call(client)
+    except Exception:
+        pass  # the first real call retries the import and reports the error
+
+
+def get_model(name):
+    model = _models.get(name)
+    if model is None:
+        genai = client()
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                model = _models[name] = genai.GenerativeModel(name)
+    return model
+
+
+def _deadline():
+    # The pool stops waiting after its timeout, but only the SDK can end the
+    # call itself and give the OS thread back
+    return {"timeout": ai_pool.timeout}
+
+
+def _observed(model_name, mode, fn):
+    """Run fn() in the AI pool, recording its latency and failures."""
+    start = time.perf_counter()
+    try:
+        return ai_pool.call(fn)
+    except Exception as e:
+        gemini_failures.inc(model=model_name, mode=mode, error=type(e).__name__)
+        raise
+    finally:
+        gemini_latency.observe(time.perf_counter() - start, model=model_name, mode=mode)
+
+
+def cached(model_name, prompt):
+    """Cached response text for `prompt`, or None — never calls the model."""
+    return response_cache.get(prompt_key(model_name, prompt))
+
+
+def generate(model_name, prompt, cache=True):
+    """Return the response text for `prompt`, served from cache when possible.
+
+    Concurrent identical requests are coalesced into one call, which runs
+    in the bounded AI pool. Errors (including PoolOverloaded) propagate so
+    callers keep their own fallbacks; only successful responses are cached.
+    """
+    key = prompt_key(model_name, prompt)
+    if cache:
+        text = response_cache.get(key)
+        if text is not None:
+            return text
+
+    def call():
+        model = get_model(model_name)
+        text = _observed(model_name, "generate", lambda: model.generate_content(prompt, request_options=_deadline()).text)
+        if cache:
+            response_cache.set(key, text)
+        return text
+
+    return flights.do(key, call)
+
+
+def stream(model_name, prompt):
+    """Yield response text chunks as the model produces them.
+
+    Stopping iteration early (e.g. the client went away) abandons the
+    underlying streaming call. Each blocking read runs in the AI pool.
+    """
+    model = get_model(model_name)
+    chunks = iter(_observed(model_name, "stream_open", lambda: model.generate_content(prompt, stream=True, request_options=_deadline())))
+    while True:
+        chunk = _observed(model_name, "stream_chunk", lambda: next(chunks, None))
+        if chunk is None:
+            return
+        text = getattr(chunk, "text", "")
+        if text:
+            yield text
@@ -0,0 +1,180 @@
+# api/idempotency.py — replay the first response to a retried POST
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, jsonify, make_response, request
+
+# begin() outcomes
+NEW, REPLAY, BUSY, MISMATCH = "new", "replay", "busy", "mismatch"
+
+
+class MemoryIdempotencyStore:
+    """Keys in this process (per worker), at most `maxsize`; oldest dropped first.
+
+    A key is "pending" while its first request runs (for at most `lease`
+    seconds, in case that request dies) and then holds the response for `ttl`.
+    """
+
+    def __init__(self, maxsize=10000, ttl=86400, lease=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lease = lease
+        self._entries = OrderedDict()  # key -> [fingerprint, response or None, expires]
+        self._lock = threading.Lock()
+
+    def begin(self, key, fingerprint, now):
+        """Claim `key`, or report why not: (outcome, stored response or None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= now:
+                self._entries[key] = [fingerprint, None, now + self.lease]
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                return NEW, None
+            if entry[0] != fingerprint:
+                return MISMATCH, None
+            return (BUSY, None) if entry[1] is None else (REPLAY, entry[1])
+
+    def finish(self, key, response, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1], entry[2] = response, now + self.ttl
+
+    def abandon(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is None:
+                del self._entries[key]
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteIdempotencyStore:
+    """Keys in a SQLite table, shared by every worker and kept across restarts."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        key         TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        response    TEXT,          -- NULL while the first request runs
+        expires     REAL NOT NULL
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db, ttl=86400, lease=60, prune_every=1000):
+        self.db = db
+        self.ttl = ttl
+        self.lease = lease
+        self.prune_every = prune_every
+        self._claims = 0
+
+    def init_schema(self):
+        self.db.executescript(self.SCHEMA)
+
+    def begin(self, key, fingerprint, now):
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT fingerprint, response, expires FROM idempotency_keys WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row["expires"] > now:
+                if row["fingerprint"] != fingerprint:
+                    return MISMATCH, None
+                return (BUSY, None) if row["response"] is None else (REPLAY, json.loads(row["response"]))
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, response, expires) VALUES (?, ?, NULL, ?)",
+                (key, fingerprint, now + self.lease),
+            )
+            self._claims += 1
+            if self._claims % self.prune_every == 0:
+                conn.execute("DELETE FROM idempotency_keys WHERE expires < ?", (now,))
+        return NEW, None
+
+    def finish(self, key, response, now):
+        self.db.execute(
+            "UPDATE idempotency_keys SET response = ?, expires = ? WHERE key = ?",
+            (json.dumps(response), now + self.ttl, key),
+        )
+
+    def abandon(self, key):
+        self.db.execute("DELETE FROM idempotency_keys WHERE key = ? AND response IS NULL", (key,))
+
+    def size(self):
+        return self.db.query_one("SELECT COUNT(*) AS n FROM idempotency_keys")["n"]
+
+
+def fingerprint(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Idempotency:
+    """Decorator factory: a POST retried with the same key gets the first answer.
+
+    The key is the view's natural key when it has one (natural_key(data)
+    returns (key, parts that must match)), else the client's
+    Idempotency-Key header, scoped by `scope()` (e.g. the user). Requests
+    without a key run as before. Only successful responses are kept, so a
+    rejected or failed request can be corrected and sent again. A retry
+    that arrives while the first request is still running gets 409 and
+    Retry-After.
+    """
+
+    HEADER = "Idempotency-Key"
+
+    def __init__(self, store, scope=lambda: ""):
+        self.store = store
+        self.scope = scope
+        self.replayed = 0
+        self.conflicts = 0
+
+    def __call__(self, natural_key=None):
+        def decorate(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                natural = natural_key(request.get_json(silent=True) or {}) if natural_key else None
+                if natural:
+                    key, parts = f"{request.endpoint}:{natural[0]}", natural[1]
+                elif request.headers.get(self.HEADER):
+                    key = f"{request.endpoint}:{self.scope()}:{request.headers[self.HEADER][:255]}"
+                    parts = request.get_data(as_text=True)
+                else:
+                    return view(*args, **kwargs)
+                return self._run(key, fingerprint(parts), view, args, kwargs)
+            return wrapper
+        return decorate
+
+    def _run(self, key, digest, view, args, kwargs):
+        outcome, saved = self.store.begin(key, digest, time.time())
+        if outcome == REPLAY:
+            self.replayed += 1
+            return Response(saved["body"], status=saved["status"], content_type=saved["content_type"],
+                            headers={"Idempotent-Replayed": "true"})
+        if outcome != NEW:
+            self.conflicts += 1
+            if outcome == BUSY:
+                return jsonify({"error": "This request is still being processed"}), 409, {"Retry-After": "1"}
+            return jsonify({"error": "Idempotency key reused with a different request"}), 422
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except BaseException:
+            self.store.abandon(key)
+            raise
+        if response.status_code >= 400:
+            self.store.abandon(key)
+        else:
+            self.store.finish(key, {
+                "status": response.status_code,
+                "body": response.get_data(as_text=True),
+                "content_type": response.content_type,
+            }, time.time())
+        return response
+
+    def stats(self):
+        return {"keys": self.store.size(), "replayed": self.replayed, "conflicts": self.conflicts}
@@ -0,0 +1,232 @@
+# api/jobs.py — background job queue (in-process, or durable on SQLite)
+import json
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+
+MAX_BACKOFF = 5.0     # seconds a worker waits after repeated store errors
+FINISH_ATTEMPTS = 3
+
+
+class MemoryJobStore:
+    """Jobs live in this process only; lost on restart."""
+
+    def __init__(self, keep=10000):
+        self._jobs = {}
+        self._queue = deque()
+        self._done = deque()
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    def put(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._queue.append(job["id"])
+
+    def claim(self):
+        with self._lock:
+            if not self._queue:
+                return None
+            job = self._jobs[self._queue.popleft()]
+            job.update(status="running", attempts=job["attempts"] + 1, updated_at=time.time())
+            return dict(job)
+
+    def finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(status=status, result=result, error=error, updated_at=time.time())
+            self._done.append(job_id)
+            while len(self._done) > self._keep:
+                self._jobs.pop(self._done.popleft(), None)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def depth(self):
+        with self._lock:
+            return len(self._queue)
+
+
+class SQLiteJobStore:
+    """Jobs in a SQLite table shared by every worker process.
+
+    Claims are atomic (UPDATE ... RETURNING), and a job whose worker died
+    is handed out again once its lease expires.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id         TEXT PRIMARY KEY,
+        kind       TEXT NOT NULL,
+        payload    TEXT NOT NULL,
+        status     TEXT NOT NULL,
+        result     TEXT,
+        error      TEXT,
+        attempts   INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+    """
+
+    def __init__(self, db, lease=300):
+        self.db = db
+        self.lease = lease
+
+    def init_schema(self):
+        self.db.executescript(self.SCHEMA)
+
+    def put(self, job):
+        self.db.execute(
+            "INSERT INTO jobs (id, kind, payload, status, attempts, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 0, ?, ?)",
+            (job["id"], job["kind"], json.dumps(job["payload"]), job["status"], job["created_at"], job["updated_at"]),
+        )
+
+    def claim(self):
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' "
+                "            OR (status = 'running' AND updated_at < ?) ORDER BY created_at LIMIT 1) "
+                "RETURNING *",
+                (now, now - self.lease),
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def finish(self, job_id, status, result=None, error=None):
+        self.db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result), error, time.time(), job_id),
+        )
+
+    def get(self, job_id):
+        row = self.db.query_one("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._decode(row) if row else None
+
+    def depth(self):
+        return self.db.query_one("SELECT COUNT(*) AS n FROM jobs WHERE status = 'queued'")["n"]
+
+    @staticmethod
+    def _decode(row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        return job
+
+
+class JobQueue:
+    """Runs registered handlers on background workers.
+
+    `spawn`/`sleep` come from the Socket.IO server so workers are green
+    threads under eventlet. `on_finish(job)` is called after each job.
+    """
+
+    def __init__(self, store, spawn, sleep, workers=2, poll_interval=0.1, on_finish=None):
+        self.store = store
+        self.spawn = spawn
+        self.sleep = sleep
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.on_finish = on_finish
+        self.completed = 0
+        self.failed = 0
+        self.errors = 0  # store / on_finish errors the workers survived
+        self._handlers = {}
+        self._started = False
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind, payload):
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.store.put(job)
+        return job["id"]
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        for _ in range(self.workers):
+            self.spawn(self._work)
+
+    def _work(self):
+        # Nothing may end this loop: an error in the store (e.g. "database is
+        # locked") or in on_finish is logged, and the worker backs off and
+        # carries on
+        backoff = self.poll_interval
+        while True:
+            try:
+                job = self.store.claim()
+                if job is None:
+                    self.sleep(self.poll_interval)
+                    continue
+                self.run(job)
+                backoff = self.poll_interval
+            except Exception:
+                traceback.print_exc()
+                self.errors += 1
+                self.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def run(self, job):
+        try:
+            result = self._handlers[job["kind"]](job["payload"])
+        except Exception as e:
+            traceback.print_exc()
+            status, result, error = "failed", None, str(e) or type(e).__name__
+        else:
+            status, error = "done", None
+        self._finish(job, status, result, error)
+        if status == "done":
+            self.completed += 1
+        else:
+            self.failed += 1
+        if self.on_finish:
+            try:
+                self.on_finish(self.store.get(job["id"]))
+            except Exception:
+                traceback.print_exc()  # the job itself is recorded; only the notification is lost
+                self.errors += 1
+
+    def _finish(self, job, status, result, error):
+        """Record the outcome, retrying briefly; if the store stays unwritable
+        the job is left 'running', and SQLiteJobStore hands it out again once
+        its lease expires."""
+        for attempt in range(FINISH_ATTEMPTS):
+            try:
+                return self.store.finish(job["id"], status, result=result, error=error)
+            except Exception:
+                if attempt == FINISH_ATTEMPTS - 1:
+                    raise
+                self.sleep(self.poll_interval * 2 ** attempt)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queued": self.store.depth(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
@@ -0,0 +1,66 @@
+# api/live.py — coalesced, rate-limited Socket.IO pushes to rooms
+import threading
+import time
+from collections import OrderedDict
+
+
+class RoomPublisher:
+    """Batches pushes per room so each room gets at most `max_rate` flushes/sec.
+
+    Publishing only records the event; a background task emits it when the
+    room's window opens. Within a window repeated events are coalesced:
+    a callable payload is evaluated once at flush time (so stats are read
+    once, not once per booking) and `count` reports how many were merged.
+    """
+
+    def __init__(self, socketio, max_rate=2.0):
+        self.socketio = socketio
+        self.interval = 1.0 / max_rate
+        self.published = 0
+        self.emitted = 0
+        self._pending = {}     # room -> {event: (payload, count)}
+        # room -> monotonic time of its last flush, oldest first. Only flushes
+        # within the last interval delay anything, so older ones are dropped.
+        self._last_flush = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, room, event, payload):
+        with self._lock:
+            self.published += 1
+            events = self._pending.get(room)
+            schedule = events is None
+            if schedule:
+                events = self._pending[room] = {}
+            _, count = events.get(event, (None, 0))
+            events[event] = (payload, count + 1)
+            delay = self._last_flush.get(room, 0) + self.interval - time.monotonic()
+        if schedule:
+            self.socketio.start_background_task(self._flush_later, room, max(delay, 0))
+
+    def _flush_later(self, room, delay):
+        if delay:
+            self.socketio.sleep(delay)
+        self.flush(room)
+
+    def flush(self, room):
+        with self._lock:
+            now = time.monotonic()  # taken under the lock, so the map stays in time order
+            events = self._pending.pop(room, None)
+            self._last_flush[room] = now
+            self._last_flush.move_to_end(room)
+            while next(iter(self._last_flush.values())) <= now - self.interval:
+                self._last_flush.popitem(last=False)
+        if not events:
+            return
+        for event, (payload, count) in events.items():
+            data = payload() if callable(payload) else dict(payload)
+            if count > 1:
+                data["count"] = count
+            self.socketio.emit(event, data, to=room)
+            with self._lock:
+                self.emitted += 1
+
+    def stats(self):
+        with self._lock:
+            return {"published": self.published, "emitted": self.emitted, "pending_rooms": len(self._pending),
+                    "tracked_rooms": len(self._last_flush)}
@@ -0,0 +1,222 @@
+# api/metrics.py — in-process counters, gauges and histograms in Prometheus text format
+import bisect
+import functools
+import math
+import threading
+import time
+
+# Seconds: from a cache hit to a slow model call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; observe() is one bisect and three adds."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = [(k, list(counts), total, n) for k, (counts, total, n) in self._values.items()]
+        lines = self.header()
+        for key, counts, total, n in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    """Named metrics plus collectors that read other components at scrape time."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, fn):
+        """fn() yields (name, kind, help, {label: value} or None, value) samples."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        families = {}  # name -> lines; a family's samples must be contiguous
+        for fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception:
+                continue
+            for name, kind, help, labels, value in samples:
+                family = families.get(name)
+                if family is None:
+                    family = families[name] = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                labels = labels or {}
+                family.append(f"{name}{_labels(labels, labels.values())} {_number(value)}")
+        for family in families.values():
+            lines.extend(family)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- shared instruments (used by api.gemini, api.rates and the server) ---
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_requests = registry.counter(
+    "http_requests_total", "HTTP responses by route and status", ("method", "route", "status"))
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being handled", ("route",))
+
+socket_latency = registry.histogram(
+    "socketio_event_duration_seconds", "Socket.IO handler latency by event", ("event",))
+socket_errors = registry.counter(
+    "socketio_event_errors_total", "Socket.IO handlers that raised", ("event",))
+socket_in_flight = registry.gauge(
+    "socketio_events_in_flight", "Socket.IO handlers running", ("event",))
+
+gemini_latency = registry.histogram(
+    "gemini_request_duration_seconds", "Gemini call latency (cache hits excluded)", ("model", "mode"))
+gemini_failures = registry.counter(
+    "gemini_request_failures_total", "Gemini calls that raised", ("model", "mode", "error"))
+
+rates_latency = registry.histogram(
+    "exchange_rate_refresh_duration_seconds", "Exchange-rate upstream fetch latency")
+rates_failures = registry.counter(
+    "exchange_rate_refresh_failures_total", "Exchange-rate fetches that failed")
+
+
+def socket_event(event):
+    """Decorator timing a Socket.IO handler (apply below @socketio.on)."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            socket_in_flight.inc(event=event)
+            start = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            except Exception:
+                socket_errors.inc(event=event)
+                raise
+            finally:
+                socket_latency.observe(time.perf_counter() - start, event=event)
+                socket_in_flight.dec(event=event)
+        return wrapper
+    return decorator
+
+
+def cache_samples(name, stats):
+    """Collector samples for a TTLCache.stats() dict."""
+    labels = {"cache": name}
+    yield "cache_hits_total", "counter", "Cache hits", labels, stats["hits"]
+    yield "cache_misses_total", "counter", "Cache misses", labels, stats["misses"]
+    yield "cache_evictions_total", "counter", "Cache LRU evictions", labels, stats["evictions"]
+    yield "cache_entries", "gauge", "Entries held in memory", labels, stats["size"]
+    yield "cache_hit_ratio", "gauge", "Hits / lookups since start", labels, stats["hit_ratio"]
@@ -0,0 +1,142 @@
+# api/pricing.py — local nightly-price suggestions from the catalog
+import threading
+from bisect import bisect_left, insort
+
+from api.search_index import tokenize
+
+# numpy is imported inside reprice_all(), the only batch path, so importing
+# the server (and answering health checks) does not wait for it
+
+DEFAULT_PRICE = 250  # same fallback the AI endpoint always used
+MIN_SAMPLES = 5      # below this a location's spread is too noisy to clip to
+
+
+def _quantile(sorted_prices, q):
+    """Linear-interpolated quantile of an already sorted list: O(1)."""
+    pos = q * (len(sorted_prices) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_prices) - 1)
+    return float(sorted_prices[lo] + (sorted_prices[hi] - sorted_prices[lo]) * (pos - lo))
+
+
+class PricingModel:
+    """Price statistics over every listing, kept sorted as listings change.
+
+    A suggestion looks at the listing's location: its median, the median
+    of comparables (same location, sharing the most specific title word,
+    e.g. "villa") and the 10th–90th percentile band. Prices are kept in
+    sorted lists per location and per (location, title word), updated in
+    place with bisect.insort, so a new or repriced listing costs one
+    insertion per group and a suggestion is a few O(1) lookups —
+    microseconds, no network, and nothing is ever rebuilt on a request.
+    """
+
+    def __init__(self):
+        self._ids = []
+        self._prices = []
+        self._codes = []       # location code per listing
+        self._titles = []
+        self._positions = {}   # property id -> index in the lists above
+        self._code_of = {}     # location -> code
+        self._by_location = []  # code -> sorted prices
+        self._by_word = {}     # (code, title word) -> sorted prices
+        self._all = []         # every price, sorted
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _groups(self, i):
+        code = self._codes[i]
+        return [self._all, self._by_location[code]] + [self._by_word[(code, w)] for w in self._titles[i]]
+
+    def add(self, prop):
+        price = float(prop["price"])
+        location = prop["location"].strip().lower()
+        with self._lock:
+            code = self._code_of.get(location)
+            if code is None:
+                code = self._code_of[location] = len(self._by_location)
+                self._by_location.append([])
+            self._positions[prop["id"]] = len(self._ids)
+            self._ids.append(prop["id"])
+            self._prices.append(price)
+            self._codes.append(code)
+            self._titles.append(frozenset(tokenize(prop["title"])))
+            for word in self._titles[-1]:
+                self._by_word.setdefault((code, word), [])
+            for group in self._groups(len(self._ids) - 1):
+                insort(group, price)
+
+    def update(self, prop):
+        """Replace a listing's price (e.g. after background repricing)."""
+        price = float(prop["price"])
+        with self._lock:
+            i = self._positions.get(prop["id"])
+            if i is not None:
+                old = self._prices[i]
+                if old == price:
+                    return
+                for group in self._groups(i):
+                    del group[bisect_left(group, old)]
+                    insort(group, price)
+                self._prices[i] = price
+                return
+        self.add(prop)
+
+    def suggest(self, location, title=None, price=None):
+        with self._lock:
+            if not self._ids:
+                return {"price": round(price or DEFAULT_PRICE), "comparables": 0, "source": "local"}
+            code = self._code_of.get((location or "").strip().lower())
+            pool = self._by_location[code] if code is not None else self._all
+            median = _quantile(pool, 0.5)
+            base = median
+            comparables = 0
+            if code is not None:
+                comps = [self._by_word[(code, w)] for w in set(tokenize(title))
+                         if len(self._by_word.get((code, w), ())) >= 2]
+                if comps:
+                    best = min(comps, key=len)
+                    comparables = len(best)
+                    base = _quantile(best, 0.5)
+
+            suggested = base if price is None else (base + float(price)) / 2
+            if len(pool) >= MIN_SAMPLES:
+                suggested = min(max(suggested, _quantile(pool, 0.1)), _quantile(pool, 0.9))
+            return {
+                "price": round(suggested),
+                "location_median": round(median, 2),
+                "p25": round(_quantile(pool, 0.25), 2),
+                "p75": round(_quantile(pool, 0.75), 2),
+                "samples": len(pool),
+                "comparables": comparables,
+                "source": "local",
+            }
+
+    def reprice_all(self):
+        """Suggested price for every listing in one vectorized pass.
+
+        Each listing moves halfway toward its location median, clipped to
+        the location's 10th–90th percentile band when it has enough samples.
+        """
+        if not self._ids:
+            return []
+        import numpy as np
+
+        with self._lock:
+            ids = list(self._ids)
+            prices = np.array(self._prices, dtype=np.float64)
+            codes = np.array(self._codes, dtype=np.int64)
+            # Per-location band, read off the sorted groups: O(locations)
+            medians, p10, p90, counts = (np.array(column, dtype=np.float64) for column in zip(*(
+                (_quantile(g, 0.5), _quantile(g, 0.1), _quantile(g, 0.9), len(g)) for g in self._by_location
+            )))
+
+        suggested = (prices + medians[codes]) / 2
+        clip = counts[codes] >= MIN_SAMPLES
+        suggested = np.where(clip, np.clip(suggested, p10[codes], p90[codes]), suggested)
+        return [
+            {"id": pid, "price": price, "suggested": round(float(s))}
+            for pid, price, s in zip(ids, prices.tolist(), suggested)
+        ]
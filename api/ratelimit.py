@@ -0,0 +1,140 @@
+# api/ratelimit.py — token-bucket rate limits and an admission cap for AI work
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from api.workers import PoolOverloaded
+
+
+def _refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+class MemoryBucketStore:
+    """Buckets in this process (per worker); least recently used keys are dropped."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        """Spend one token; returns seconds until one is available (0 = allowed)."""
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = _refill(tokens, updated_at, now, rate, burst)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite table, shared by every worker process.
+
+    Each check is one short BEGIN IMMEDIATE transaction; use it when
+    several workers must enforce one limit between them.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key        TEXT PRIMARY KEY,
+        tokens     REAL NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db, prune_every=1000):
+        self.db = db
+        self.prune_every = prune_every
+        self._checks = 0
+
+    def init_schema(self):
+        self.db.executescript(self.SCHEMA)
+
+    def take(self, key, rate, burst, now):
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(row[0], row[1], now, rate, burst) if row else burst
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens - 1 if not wait else tokens, now),
+            )
+            self._checks += 1
+            if self._checks % self.prune_every == 0:
+                # A bucket untouched for an hour is full again: the row carries no state
+                conn.execute("DELETE FROM rate_limits WHERE updated_at < ?", (now - 3600,))
+        return wait
+
+
+class RateLimiter:
+    """Token buckets per (route class, client).
+
+    `limits` maps a route class (e.g. "cheap", "ai") to (rate per second,
+    burst). A client is its user id when authenticated, else its IP.
+    """
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = dict(limits)
+        self.allowed = 0
+        self.limited = {name: 0 for name in self.limits}
+
+    def check(self, route_class, client):
+        """Seconds the client must wait before retrying, or 0 if allowed."""
+        rate, burst = self.limits[route_class]
+        wait = self.store.take(f"{route_class}:{client}", rate, burst, time.time())
+        if wait:
+            self.limited[route_class] += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def stats(self):
+        return {"allowed": self.allowed, "limited": dict(self.limited)}
+
+
+def retry_after(wait):
+    """Retry-After header value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(wait)))
+
+
+class AdmissionLimit:
+    """At most `limit` AI-backed requests at once; the rest fail fast.
+
+    Rejection raises PoolOverloaded, so callers answer 503 + Retry-After
+    (or the socket 'busy' message) at once instead of queueing into the
+    AI pool and timing out.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                raise PoolOverloaded("ai admission")
+            self.active += 1
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self):
+        with self._lock:
+            return {"limit": self.limit, "active": self.active, "rejected": self.rejected}
@@ -0,0 +1,98 @@
+# api/rates.py — exchange-rate table refreshed in the background, served from memory
+import os
+import threading
+import time
+
+from api.metrics import rates_failures, rates_latency
+from api.workers import http_pool
+
+# Used until the first successful refresh (and if the upstream stays down)
+FALLBACK_RATES = {"USD": 1.0, "PKR": 278.5, "EUR": 0.92, "GBP": 0.79, "AED": 3.67, "SAR": 3.75, "INR": 84.0}
+
+
+def default_upstream_url():
+    url = os.getenv("EXCHANGE_RATE_URL")
+    if url:
+        return url
+    key = os.getenv("EXCHANGE_RATE_API_KEY")
+    if key:
+        return f"https://v6.exchangerate-api.com/v6/{key}/latest/USD"
+    return "https://api.exchangerate-api.com/v4/latest/USD"
+
+
+def parse_rates(data):
+    # v6 (keyed) responses use conversion_rates, v4 (free) responses use rates
+    if data.get("result") == "success":
+        return data["conversion_rates"]
+    if data.get("rates"):
+        return data["rates"]
+    raise ValueError("Unexpected exchange-rate payload")
+
+
+class RateService:
+    """USD-based rate table that one background task keeps fresh.
+
+    Conversions never touch the network. `url` (or EXCHANGE_RATE_URL)
+    can point at a local stub for tests and benchmarks.
+    """
+
+    def __init__(self, url=None, refresh_interval=3600, timeout=5):
+        self.url = url or default_upstream_url()
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.failures = 0
+        self._rates = dict(FALLBACK_RATES)
+        self._updated_at = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def refresh(self):
+        import requests  # first use is in the background loop, not at startup
+
+        try:
+            with rates_latency.time():
+                data = http_pool.call(lambda: requests.get(self.url, timeout=self.timeout).json())
+            fetched = {k.upper(): float(v) for k, v in parse_rates(data).items()}
+        except Exception:
+            self.failures += 1
+            rates_failures.inc()
+            return False
+        fetched["USD"] = 1.0
+        with self._lock:
+            self._rates = fetched
+            self._updated_at = time.time()
+        return True
+
+    def start(self, spawn, sleep):
+        """Begin refreshing with the given spawn/sleep (socketio.start_background_task/sleep)."""
+        if self._started:
+            return
+        self._started = True
+
+        def loop():
+            while True:
+                # Retry sooner while we are still serving fallback rates
+                ok = self.refresh()
+                sleep(self.refresh_interval if ok else min(60, self.refresh_interval))
+
+        spawn(loop)
+
+    def rate(self, currency):
+        with self._lock:
+            return self._rates.get(currency.upper(), FALLBACK_RATES.get(currency.upper()))
+
+    def age(self):
+        """Seconds since the last successful refresh, or None if still on fallback rates."""
+        return None if self._updated_at is None else time.time() - self._updated_at
+
+    def snapshot(self):
+        with self._lock:
+            rates, updated_at = dict(self._rates), self._updated_at
+        age = self.age()
+        return {
+            "base": "USD",
+            "rates": rates,
+            "source": "live" if updated_at else "fallback",
+            "updated_at": updated_at,
+            "age_seconds": None if age is None else round(age),
+        }
@@ -0,0 +1,128 @@
+# api/search_index.py — in-process inverted index for property search
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MIN_PREFIX = 2
+
+# Field weights: a whole-word hit beats a prefix hit, a title hit beats a location hit
+WEIGHTS = {
+    "title": {"token": 3.0, "prefix": 1.0},
+    "location": {"token": 4.0, "prefix": 1.5},
+}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+class SearchIndex:
+    """Token + prefix postings over property title and location.
+
+    Every term maps to {property_id: score}, so a query costs one dict
+    lookup per query token instead of a scan over the whole catalog. Only
+    ids are kept: callers hydrate results from the store, so a listing's
+    price is never served from a copy taken when it was indexed.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._terms = {}   # property_id -> terms it was indexed under
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _terms_for(self, prop):
+        terms = defaultdict(float)
+        for field, weight in WEIGHTS.items():
+            for token in tokenize(prop.get(field)):
+                terms[token] += weight["token"]
+                for i in range(MIN_PREFIX, len(token)):
+                    terms[token[:i]] += weight["prefix"]
+        return terms
+
+    def add(self, prop):
+        terms = self._terms_for(prop)
+        with self._lock:
+            self._remove_locked(prop["id"])
+            for term, score in terms.items():
+                self._postings[term][prop["id"]] = score
+            self._terms[prop["id"]] = list(terms)
+
+    def _remove_locked(self, property_id):
+        for term in self._terms.pop(property_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(property_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query, offset=0, limit=20, match_all=True):
+        """Return (total_matches, ranked page of property ids).
+
+        With match_all every query token must match (AND); otherwise any
+        token may (OR), which suits free-text queries. Ranking is the summed
+        term score, ties broken by newest listing first. Only the best
+        offset + limit matches are ordered (a bounded heap), not all of them.
+        """
+        with self._lock:
+            scores = self._scores_locked(query, match_all)
+            page = [pid for pid, _ in _top(scores, offset + limit)[offset:]]
+        return len(scores), page
+
+    def scored(self, query, match_all=True):
+        """Yield matches as (property_id, score) pairs, best first.
+
+        Ranked in growing batches, so a caller that stops after a page
+        never pays for ordering the rest.
+        """
+        with self._lock:
+            scores = dict(self._scores_locked(query, match_all))
+        done, k = 0, 32
+        while done < len(scores):
+            ranked = _top(scores, k)
+            yield from ranked[done:]
+            done, k = len(ranked), k * 4
+
+    def _scores_locked(self, query, match_all):
+        """{property_id: score} for the query; may be a live posting dict, so read it under the lock."""
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        postings = [self._postings.get(t) for t in dict.fromkeys(tokens)]
+        if match_all:
+            if not all(postings):
+                return {}
+            postings.sort(key=len)
+            scores = postings[0]
+            for other in postings[1:]:
+                scores = {pid: s + other[pid] for pid, s in scores.items() if pid in other}
+                if not scores:
+                    break
+            return scores
+        scores = defaultdict(float)
+        for postings_for_token in filter(None, postings):
+            for pid, s in postings_for_token.items():
+                scores[pid] += s
+        return scores
+
+
+def _top(scores, k):
+    """The k best (property_id, score) pairs: highest score, then newest id.
+
+    nlargest keyed on dict.get does the O(n log k) pass in C; ties at the
+    cut-off score are then settled by id, so the order is exact.
+    """
+    if k <= 0 or not scores:
+        return []
+    best = heapq.nlargest(k, scores, key=scores.get)
+    if len(best) < len(scores):
+        cut = scores[best[-1]]
+        above = [pid for pid in best if scores[pid] > cut]
+        best = above + heapq.nlargest(k - len(above), [pid for pid, s in scores.items() if s == cut])
+    best.sort(key=lambda pid: (-scores[pid], -pid))
+    return [(pid, scores[pid]) for pid in best]
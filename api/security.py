@@ -1,8 +1,115 @@
-import jwt, os
+# api/security.py — JWT auth: keys loaded once, verified-token cache, route decorator
+import functools
+import os
+import secrets
+import time
+
+import jwt
 from dotenv import load_dotenv
+from flask import g, jsonify, request
+
+from api.ai_cache import TTLCache
+
 load_dotenv()
 
-SECRET = os.getenv("SECRET_KEY")
+TOKEN_LIFETIME = 86400
+
+
+class KeyRing:
+    """HMAC signing keys by key id (kid).
+
+    New tokens are signed with the active key; verification accepts any
+    key still in the ring, so keys can be rotated without logging everyone
+    out. SECRET_KEYS="kid:secret,kid2:secret2" lists them (first = active);
+    otherwise SECRET_KEY alone is used.
+    """
+
+    def __init__(self, keys, active_kid):
+        self.keys = dict(keys)
+        self.active_kid = active_kid
+
+    @classmethod
+    def from_env(cls):
+        keys = {}
+        for item in filter(None, (os.getenv("SECRET_KEYS") or "").split(",")):
+            kid, _, secret = item.strip().partition(":")
+            if kid and secret:
+                keys[kid] = secret
+        if keys:
+            return cls(keys, next(iter(keys)))
+        secret = os.getenv("SECRET_KEY")
+        if not secret:
+            # Tokens will not survive a restart or work across workers
+            print("[WARN] SECRET_KEY not set — using a random per-process JWT key")
+            secret = secrets.token_urlsafe(32)
+        return cls({"default": secret}, "default")
+
+    @property
+    def active_key(self):
+        return self.keys[self.active_kid]
+
+    def candidates(self, kid):
+        if kid in self.keys:
+            return [self.keys[kid]]
+        # Tokens issued before kids existed carry no header: try every key
+        return list(self.keys.values()) if kid is None else []
+
+
+keyring = KeyRing.from_env()
+
+# token -> verified claims; entries never outlive the token's exp
+verified_tokens = TTLCache(
+    maxsize=int(os.getenv("JWT_CACHE_SIZE", 4096)),
+    ttl=float(os.getenv("JWT_CACHE_TTL", 300)),
+)
+
+
+def create_jwt(user_id):
+    now = time.time()
+    payload = {
+        "user_id": user_id,
+        "exp": now + TOKEN_LIFETIME,
+        "iat": now
+    }
+    return jwt.encode(payload, keyring.active_key, algorithm="HS256", headers={"kid": keyring.active_kid})
+
+
+def verify_jwt(token):
+    if not token:
+        return None
+    now = time.time()
+    claims = verified_tokens.get(token)
+    if claims is not None and claims["exp"] > now:
+        return claims
+
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except jwt.PyJWTError:
+        return None
+    for key in keyring.candidates(kid):
+        try:
+            claims = jwt.decode(token, key, algorithms=["HS256"], options={"require": ["exp"]})
+        except jwt.PyJWTError:
+            continue
+        verified_tokens.set(token, claims, ttl=min(claims["exp"] - now, verified_tokens.ttl))
+        return claims
+    return None
+
+
+def bearer_token():
+    return request.headers.get("Authorization", "").replace("Bearer ", "")
+
+
+def require_auth(view):
+    """Reject the request with 401 unless it carries a valid Bearer token.
 
-def create_token(user):
-    return jwt.encode({"user": user, "exp": time.time() + 86400}, SECRET, algorithm="HS256")
\ No newline at end of file
+    The verified claims are available to the view as flask.g.user.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        claims = verify_jwt(bearer_token())
+        if not claims:
+            return jsonify({"error": "Unauthorized"}), 401
+        g.user = claims
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,68 +1,272 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, url_for
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
-import google.generativeai as genai
+from flask_socketio import SocketIO, emit, join_room
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
+import hashlib
 import os
-import jwt
+import threading
 import time
 import uuid
-import requests
-from datetime import datetime
+from datetime import date, datetime, timedelta
+
+from api import gemini, metrics
+from api.availability import MAX_NIGHTS, AvailabilityEngine, parse_stay, today_utc
+from api.client_errors import ErrorCollector
+from api.credentials import hash_password, verify_password
+from api.db import Database, database_path
+from api.idempotency import Idempotency, MemoryIdempotencyStore, SQLiteIdempotencyStore
+from api.jobs import JobQueue, MemoryJobStore, SQLiteJobStore
+from api.live import RoomPublisher
+from api.pricing import PricingModel
+from api.rates import RateService
+from api.search_index import SearchIndex
+from api.ratelimit import AdmissionLimit, MemoryBucketStore, RateLimiter, SQLiteBucketStore, retry_after
+from api.security import bearer_token, create_jwt, require_auth, verified_tokens, verify_jwt
+from api.socket_queue import socketio_options
+from api.store import Store
+from api.translations import LANGUAGES, translate_batch, translation_store
+from api.workers import PoolOverloaded, ai_pool, hash_pool, http_pool
 
 # === LOAD ENV & CONFIG ===
 load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "fallback-secret-key-123")
 
-CORS(app, supports_credentials=True)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+# The pages are served from another origin: expose the paging/retry headers to them
+CORS(app, supports_credentials=True, expose_headers=["X-Next-Cursor", "Retry-After", "Idempotent-Replayed"])
+# SOCKETIO_MESSAGE_QUEUE (sqlite:// or redis://) lets several worker processes
+# share rooms and broadcasts; see run.py for the multi-worker launcher
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet', **socketio_options())
+
+# Behind Render's proxy set PROXY_HOPS=1 so request.remote_addr is the client,
+# not the proxy (rate limits are keyed by it)
+if int(os.getenv("PROXY_HOPS", 0)):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.getenv("PROXY_HOPS")))
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 PROFIT_SHARE = 0.7  # Property Owner gets 70%, Platform (you) gets 30%
-EXCHANGE_RATE_KEY = os.getenv("EXCHANGE_RATE_API_KEY")
-
-# === IN-MEMORY DATA (Replace with PostgreSQL in production) ===
-users = {}
-bookings = []
-properties = []
-
-# Auto-seed if empty
-if not properties:
-    properties = [
-        {"id": 1, "title": "Luxury Villa Dubai", "price": 299, "location": "Dubai"},
-        {"id": 2, "title": "Beach House Karachi", "price": 180, "location": "Karachi"},
-        {"id": 3, "title": "Mountain Cabin Murree", "price": 150, "location": "Murree"}
-    ]
-
-# === JWT HELPER ===
-def create_jwt(user_id):
-    payload = {
-        "user_id": user_id,
-        "exp": time.time() + 86400,
-        "iat": time.time()
-    }
-    return jwt.encode(payload, os.getenv("SECRET_KEY"), algorithm="HS256")
 
-def verify_jwt(token):
-    try:
-        return jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=["HS256"])
-    except:
-        return None
+# Exchange rates: refreshed in the background, conversions served from memory
+rate_service = RateService(refresh_interval=float(os.getenv("EXCHANGE_RATE_REFRESH", 3600)))
+
+# === DATA (SQLite, shared by every worker) ===
+db = Database(database_path(), pool_size=int(os.getenv("DB_POOL_SIZE", 8)))
+store = Store(db, profit_share=PROFIT_SHARE)
+# Booked nights per property, in memory; reservations are re-checked in SQL
+availability = AvailabilityEngine(store, ttl=float(os.getenv("AVAILABILITY_TTL", 30)))
+
+# Search index + pricing model: built from the store, then caught up with
+# listings other workers added or repriced (properties.updated_at)
+search_index = SearchIndex()
+pricing_model = PricingModel()
+synced_at = ""
+
+def sync_catalog():
+    global synced_at
+    changed, synced_at = store.properties_changed_since(synced_at)
+    for prop in changed:
+        search_index.add(prop)
+        pricing_model.update(prop)
+
+def hydrate(property_ids):
+    """Current listings for index hits, from the store's registry."""
+    return [prop for prop in map(store.get_property, property_ids) if prop is not None]
+
+# Dashboard pushes: owners join "owner:<email>", the platform dashboard joins "platform"
+publisher = RoomPublisher(socketio, max_rate=float(os.getenv("DASHBOARD_PUSH_RATE", 2)))
+
+# === BACKPRESSURE (worker pools full → 503) ===
+@app.errorhandler(PoolOverloaded)
+def pool_overloaded(e):
+    return jsonify({"error": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
+
+# === METRICS (per-route latency, exported on /metrics) ===
+@app.before_request
+def start_timer():
+    g.metrics_route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    g.metrics_start = time.perf_counter()
+    metrics.http_in_flight.inc(route=g.metrics_route)
+
+@app.after_request
+def record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def observe_request(exc=None):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return
+    route, method = g.metrics_route, request.method
+    metrics.http_in_flight.dec(route=route)
+    metrics.http_latency.observe(time.perf_counter() - start, method=method, route=route)
+    metrics.http_requests.inc(method=method, route=route, status=g.pop('metrics_status', 500))
+
+# === RATE LIMITS & AI ADMISSION ===
+# Token buckets per client (user id, else IP) and route class: "cheap" for
+# plain reads/writes, "ai" for anything that spends Gemini quota. Routes that
+# wait on the model also need one of AI_MAX_CONCURRENT admission slots.
+RATE_LIMITS = os.getenv("RATE_LIMITS", "1") == "1"
+limiter = RateLimiter(
+    SQLiteBucketStore(db) if os.getenv("RATE_LIMIT_STORE") == "sqlite" else MemoryBucketStore(),
+    {
+        "cheap": (float(os.getenv("RATE_LIMIT_CHEAP_RATE", 10)), float(os.getenv("RATE_LIMIT_CHEAP_BURST", 40))),
+        "ai": (float(os.getenv("RATE_LIMIT_AI_RATE", 0.5)), float(os.getenv("RATE_LIMIT_AI_BURST", 10))),
+    },
+)
+ai_admission = AdmissionLimit(int(os.getenv("AI_MAX_CONCURRENT", 16)))
+
+ROUTE_CLASSES = {
+    'translate': 'ai', 'translate_many': 'ai', 'ai_pricing': 'ai', 'list_property': 'ai',
+}
+AI_BLOCKING_ENDPOINTS = {'translate', 'translate_many'}
+RATE_LIMIT_EXEMPT = {'health', 'metrics_export', 'static'}
+
+def client_id(claims=None):
+    claims = claims or verify_jwt(bearer_token())
+    return f"user:{claims['user_id']}" if claims else f"ip:{request.remote_addr}"
+
+@app.before_request
+def admit_request():
+    if not RATE_LIMITS or request.method == 'OPTIONS' or request.endpoint in RATE_LIMIT_EXEMPT:
+        return
+    wait = limiter.check(ROUTE_CLASSES.get(request.endpoint, 'cheap'), client_id())
+    if wait:
+        return jsonify({"error": "Too many requests", "retry_after": round(wait, 1)}), 429, \
+            {"Retry-After": retry_after(wait)}
+    if request.endpoint in AI_BLOCKING_ENDPOINTS:
+        ai_admission.acquire()  # PoolOverloaded → 503
+        g.ai_admitted = True
+
+@app.teardown_request
+def release_admission(exc=None):
+    if g.pop('ai_admitted', False):
+        ai_admission.release()
+
+def socket_limited(route_class):
+    """Seconds a socket client must wait (0 = go ahead)."""
+    if not RATE_LIMITS:
+        return 0
+    return limiter.check(route_class, client_id(socket_users.get(request.sid)))
 
 # === REAL-TIME AI CHAT (Gemini 1.5 Flash) ===
+# sid -> Event set when that client disconnects mid-stream
+active_streams = {}
+
 @socketio.on('user_message')
+@metrics.socket_event('user_message')
 def handle_message(data):
     prompt = data.get('prompt', '').strip()
     if not prompt:
         return emit('ai_response', {"response": "Please say something!"})
+
+    wait = socket_limited('ai')
+    if wait:
+        return emit('ai_response', {"response": f"Slow down a little — try again in {retry_after(wait)}s.",
+                                    "busy": True, "retry_after": round(wait, 1)})
+    try:
+        ai_admission.acquire()
+    except PoolOverloaded:
+        return emit('ai_response', {"response": "AI is busy right now. Try again in a moment.", "busy": True})
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        emit('ai_response', {"response": response.text})
+        if data.get('stream'):
+            return stream_message(prompt, data.get('id'))
+        text = gemini.generate('gemini-1.5-flash', prompt, cache=False)
+        emit('ai_response', {"response": text})
+    except PoolOverloaded:
+        emit('ai_response', {"response": "AI is busy right now. Try again in a moment.", "busy": True})
     except Exception as e:
         emit('ai_response', {"response": "AI is thinking... Try again."})
+    finally:
+        ai_admission.release()
+
+def stream_message(prompt, message_id):
+    sid = request.sid
+    cancelled = threading.Event()
+    active_streams[sid] = cancelled
+    parts = []
+    try:
+        for chunk in gemini.stream('gemini-1.5-flash', prompt):
+            if cancelled.is_set():
+                return
+            parts.append(chunk)
+            emit('ai_response_chunk', {"id": message_id, "index": len(parts) - 1, "chunk": chunk})
+            socketio.sleep(0)  # let the hub flush the chunk
+    except PoolOverloaded:
+        if not parts:
+            parts.append("AI is busy right now. Try again in a moment.")
+            emit('ai_response_chunk', {"id": message_id, "index": 0, "chunk": parts[0], "busy": True})
+    except Exception:
+        if not parts:
+            parts.append("AI is thinking... Try again.")
+            emit('ai_response_chunk', {"id": message_id, "index": 0, "chunk": parts[0]})
+    finally:
+        active_streams.pop(sid, None)
+    emit('ai_response_done', {"id": message_id, "response": "".join(parts)})
+
+# === LIVE DASHBOARDS (Socket.IO rooms) ===
+# sid -> JWT claims from the connect handshake (auth: { token })
+socket_users = {}
+
+@socketio.on('connect')
+@metrics.socket_event('connect')
+def handle_connect(auth=None):
+    claims = verify_jwt((auth or {}).get('token', '')) if isinstance(auth, dict) else None
+    if claims:
+        socket_users[request.sid] = claims
+        join_room(f"user:{claims['user_id']}")  # guest pages: booking_cancelled
+
+@socketio.on('dashboard_join')
+@metrics.socket_event('dashboard_join')
+def dashboard_join(data=None):
+    data = data or {}
+    if data.get('scope') == 'platform':
+        join_room('platform')
+        return emit('owner_stats', platform_stats_payload())
+
+    claims = socket_users.get(request.sid) or verify_jwt(data.get('token', ''))
+    user = store.get_user_by_id(claims['user_id']) if claims else None
+    if not user:
+        return emit('error', {"error": "Unauthorized"})
+    join_room(f"owner:{user['email']}")
+    emit('stats_update', owner_stats_payload(user['email']))
+
+def push_booking(prop, booking, guest_email):
+    owner = prop.get('owner_email')
+    if owner:
+        room = f"owner:{owner}"
+        stats = lambda: owner_stats_payload(owner)
+        publisher.publish(room, 'stats_update', stats)
+        publisher.publish(room, 'property_stats', stats)
+        publisher.publish(room, 'new_booking', {
+            "id": booking['id'],
+            "guest": guest_email,
+            "property": prop['title'],
+            "total": booking['total']
+        })
+    push_platform_stats()
+
+def push_cancellation(prop, booking):
+    socketio.emit('booking_cancelled', booking['id'], to=f"user:{booking['user_id']}")
+    owner = prop.get('owner_email') if prop else None
+    if owner:
+        room = f"owner:{owner}"
+        stats = lambda: owner_stats_payload(owner)
+        publisher.publish(room, 'stats_update', stats)
+        publisher.publish(room, 'property_stats', stats)
+    push_platform_stats()
+
+def push_platform_stats():
+    publisher.publish('platform', 'owner_stats', platform_stats_payload)
+
+@socketio.on('disconnect')
+@metrics.socket_event('disconnect')
+def handle_disconnect(*args):
+    socket_users.pop(request.sid, None)
+    cancelled = active_streams.pop(request.sid, None)
+    if cancelled:
+        cancelled.set()
 
 # === AUTH ENDPOINTS ===
 @app.route('/api/register', methods=['POST'])
@@ -74,11 +278,12 @@ def register():
     if not email or not password:
         return jsonify({"error": "Email & password required"}), 400
     
-    if email in users:
+    if store.get_user_by_email(email):  # skip the KDF for obvious duplicates
         return jsonify({"error": "User already exists"}), 409
     
     user_id = str(uuid.uuid4())
-    users[email] = {"id": user_id, "email": email, "password": password, "role": "host"}
+    if not store.create_user(user_id, email, hash_password(password)):
+        return jsonify({"error": "User already exists"}), 409
     token = create_jwt(user_id)
     
     return jsonify({"token": token, "message": "Registered successfully"}), 201
@@ -89,8 +294,14 @@ def login():
     email = data.get('email')
     password = data.get('password')
     
-    user = users.get(email)
-    if user and user['password'] == password:
+    if not email or not password:
+        return jsonify({"error": "Invalid credentials"}), 401
+    
+    user = store.get_user_by_email(email)
+    ok, needs_rehash = verify_password(password, user['password'] if user else None)
+    if ok:
+        if needs_rehash:  # plaintext or older scrypt parameters
+            store.update_password(user['id'], hash_password(password))
         token = create_jwt(user['id'])
         return jsonify({"token": token, "user": {"email": email, "role": user['role']}})
     
@@ -99,79 +310,414 @@ def login():
 # === PROPERTY ENDPOINTS ===
 @app.route('/api/featured')
 def featured():
-    return jsonify({"properties": properties[:3]})
+    return jsonify({"properties": store.list_properties(limit=3)})
 
 @app.route('/api/search', methods=['POST'])
 def search():
-    query = request.json.get('query', '').lower()
-    filtered = [
-        p for p in properties 
-        if query in p['title'].lower() or query in p['location'].lower()
-    ]
-    return jsonify({"properties": filtered or properties})
+    data = request.json or {}
+    query = data.get('query', '')
+    try:
+        page = max(int(data.get('page', 1)), 1)
+        per_page = min(max(int(data.get('per_page', 20)), 1), 100)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid page"}), 400
+    offset = (page - 1) * per_page
+
+    sync_catalog()
+    total, ids = search_index.search(query, offset, per_page)
+    results = hydrate(ids)
+    if not total:
+        # No match → show the catalog, as before
+        total, results = store.count_properties(), store.list_properties(offset, per_page)
+
+    return jsonify({
+        "properties": results,
+        "total": total,
+        "page": page,
+        "per_page": per_page
+    })
+
+# === NEURAL SEARCH (Socket.IO ai_search) ===
+# Stage 1 answers from the local index + structured filters in milliseconds;
+# stage 2 (optional) pushes a Gemini-reranked order as a second search_results.
+AI_SEARCH_RERANK = os.getenv("AI_SEARCH_RERANK", "1") == "1"
+
+def local_search(query, filters, limit=24):
+    try:
+        min_price = float(filters.get('min_price') or 0)
+        max_price = float(filters.get('max_price') or 'inf')
+    except (TypeError, ValueError):
+        min_price, max_price = 0, float('inf')
+    location = (filters.get('location') or '').strip().lower()
+
+    if not query.strip():
+        # Filters only: let SQL apply them, so the page is full whenever enough listings match
+        props = store.filter_properties(location or None, min_price or None,
+                                        None if max_price == float('inf') else max_price, limit)
+        return [dict(p, score=1.0) for p in props]
+
+    sync_catalog()
+    candidates = ((store.get_property(pid), score) for pid, score in search_index.scored(query, match_all=False))
+
+    results = []
+    top = None
+    for prop, score in candidates:
+        top = top or score or 1.0
+        if prop is None:
+            continue
+        if not min_price <= prop['price'] <= max_price:
+            continue
+        if location and prop['location'].lower() != location:
+            continue
+        results.append(dict(prop, score=round(score / top, 2)))
+        if len(results) == limit:
+            break
+    return results
+
+@socketio.on('ai_search')
+@metrics.socket_event('ai_search')
+def ai_search(data=None):
+    data = data or {}
+    if not isinstance(data, dict):
+        return emit('search_results', {"stage": "error", "error": "Expected an object with a query",
+                                       "properties": []})
+    echo = data.get('query', '')  # sent back as received: the client matches replies on it
+    query = str(echo)[:200]
+    wait = socket_limited('cheap')
+    if wait:
+        return emit('search_results', {"query": echo, "stage": "limited", "properties": [],
+                                       "retry_after": round(wait, 1)})
+    filters = data.get('filters') or {}
+    results = local_search(query, filters if isinstance(filters, dict) else {})
+    emit('search_results', {"query": echo, "stage": "local", "properties": results})
+
+    if AI_SEARCH_RERANK and data.get('rerank', True) and query.strip() and len(results) > 1 \
+            and not socket_limited('ai'):
+        socketio.start_background_task(rerank_search, request.sid, query, results, echo)
+
+def rerank_search(sid, query, results, echo=None):
+    listing = "\n".join(f"{p['id']}: {p['title']} in {p['location']}, ${p['price']}/night" for p in results)
+    prompt = (
+        f"A guest searched: '{query}'. Rank these properties from best to worst match.\n"
+        f"{listing}\nReturn only the ids as a comma-separated list."
+    )
+    try:
+        with ai_admission:
+            text = gemini.generate('gemini-1.5-flash', prompt)
+    except Exception:
+        return
+    by_id = {p['id']: p for p in results}
+    order = []
+    for token in text.replace('\n', ',').split(','):
+        token = token.strip().strip('[]#')
+        if token.isdigit() and int(token) in by_id and int(token) not in order:
+            order.append(int(token))
+    if not order:
+        return
+    order += [pid for pid in by_id if pid not in order]
+    n = len(order)
+    reranked = [dict(by_id[pid], score=round(1 - i / n, 2)) for i, pid in enumerate(order)]
+    socketio.emit('search_results', {"query": query if echo is None else echo, "stage": "rerank",
+                                     "properties": reranked}, to=sid)
 
 # === USER LIST PROPERTY (70% to owner) ===
+# The listing is stored at once at the host's own price, with the local
+# model's suggestion returned next to it (never applied). A background job
+# then asks Gemini for a price — applied when the model answers, otherwise
+# the host's price stands — translates the title and pushes
+# 'listing_ready' to the owner's dashboard room. Poll GET /api/jobs/<id>.
+# JOBS_DURABLE=1 keeps the queue in SQLite so every worker shares it and
+# jobs survive a restart.
+def enrich_listing(payload):
+    prop = store.get_property(payload['property_id'])
+    if not prop:
+        raise LookupError(f"property {payload['property_id']} no longer exists")
+    prompt = (f"Suggest optimal nightly price for '{prop['title']}' in {prop['location']}. "
+              f"Current ${payload['price']}. Return only a number.")
+    price_source = "owner"
+    try:
+        ai_price = round(parse_price(gemini.generate('gemini-1.5-pro', prompt)))
+        if ai_price > 0:
+            price_source = "ai"
+            if ai_price != prop['price']:
+                prop = store.update_price(prop['id'], ai_price)
+                pricing_model.update(prop)  # other workers catch up in sync_catalog()
+    except Exception:
+        pass  # the host's own price stands
+
+    translations = {}
+    for lang in LANGUAGES:
+        try:
+            translated, _ = translate_batch([prop['title']], lang)
+        except Exception:
+            continue
+        translations[lang] = translated[prop['title']]
+
+    return {
+        "property": prop,
+        "owner_price": payload['price'],
+        "price_source": price_source,
+        "translations": translations
+    }
+
+def job_view(job):
+    return {k: job[k] for k in ("id", "kind", "status", "result", "error", "created_at", "updated_at")}
+
+def listing_finished(job):
+    owner = job['payload'].get('owner_email')
+    if owner:
+        socketio.emit('listing_ready', job_view(job), to=f"owner:{owner}")
+
+JOBS_DURABLE = os.getenv("JOBS_DURABLE", "0") == "1"
+jobs = JobQueue(
+    SQLiteJobStore(db) if JOBS_DURABLE else MemoryJobStore(),
+    socketio.start_background_task, socketio.sleep,
+    workers=int(os.getenv("JOB_WORKERS", 2)),
+    poll_interval=0.5 if JOBS_DURABLE else 0.1,
+    on_finish=listing_finished,
+)
+jobs.register('enrich_listing', enrich_listing)
+
 @app.route('/api/list-property', methods=['POST'])
+@require_auth
 def list_property():
+    # The owner is the signed-in host; a posted 'email' field is ignored
+    user = store.get_user_by_id(g.user['user_id'])
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    owner_email = user['email']
+
     title = request.form.get('title')
     location = request.form.get('location')
-    price = float(request.form.get('price', 0))
+    try:
+        price = float(request.form.get('price', 0))
+    except ValueError:
+        price = 0
     
     if not title or not location or price <= 0:
         return jsonify({"error": "Invalid data"}), 400
     
-    # AI Price Optimization
-    try:
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        prompt = f"Suggest optimal nightly price for '{title}' in {location}. Current ${price}. Return only a number."
-        ai_response = model.generate_content(prompt)
-        ai_price = float(ai_response.text.strip().replace('$', '').replace(',', ''))
-    except:
-        ai_price = price
+    price = int(price) if price.is_integer() else price
+
+    # Local model's suggestion (microseconds, no model call): shown, not applied
+    sync_catalog()
+    suggestion = pricing_model.suggest(location, title, price)
     
-    new_prop = {
-        "id": len(properties) + 1,
-        "title": title,
-        "location": location,
-        "price": round(ai_price),
-        "owner_email": request.form.get('email', 'unknown@host.com')
-    }
-    properties.append(new_prop)
+    new_prop = store.add_property(title, location, price, owner_email=owner_email)
+    sync_catalog()
     
-    return jsonify({"message": "Property listed!", "property": new_prop})
+    job_id = jobs.enqueue('enrich_listing', {
+        "property_id": new_prop['id'],
+        "price": price,
+        "owner_email": owner_email
+    })
+    
+    return jsonify({
+        "success": True,
+        "message": "Property listed!",
+        "property": new_prop,
+        "pricing": suggestion,
+        "job_id": job_id,
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_view(job))
+
+# === IDEMPOTENT WRITES (safe client retries) ===
+# A retried POST carrying the same Idempotency-Key (per client), or the same
+# MTCN for deposits, gets the first response back instead of running again.
+# IDEMPOTENCY_STORE=sqlite shares keys between workers and across restarts.
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 86400))
+idempotency = Idempotency(
+    SQLiteIdempotencyStore(db, ttl=IDEMPOTENCY_TTL) if os.getenv("IDEMPOTENCY_STORE") == "sqlite"
+    else MemoryIdempotencyStore(maxsize=int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000)), ttl=IDEMPOTENCY_TTL),
+    scope=client_id,
+)
+
+def mtcn_key(data):
+    """Natural key of a WU deposit: the MTCN, which must come with the same amount."""
+    mtcn = str(data.get('mtcn', '')).strip()
+    try:
+        amount = float(data.get('amount_usd', 0))
+    except (TypeError, ValueError):
+        return None
+    return (f"mtcn:{mtcn}", (mtcn, amount)) if mtcn else None
 
 # === BOOKING & PAYMENT ===
 @app.route('/api/book', methods=['POST'])
+@require_auth
+@idempotency()
 def book_property():
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    user = verify_jwt(token)
-    if not user:
-        return jsonify({"error": "Unauthorized"}), 401
-    
-    data = request.json
-    property_id = data.get('property_id')
-    nights = data.get('nights', 1)
+    user = g.user
+    data = request.json or {}
+    try:
+        property_id = int(data.get('property_id'))
+        check_in, check_out = parse_stay(data['check_in'], data.get('check_out'), data.get('nights'))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Invalid booking data: property_id, check_in (YYYY-MM-DD) and check_out or nights required"}), 400
     
-    prop = next((p for p in properties if p['id'] == property_id), None)
+    prop = store.get_property(property_id)  # id-keyed registry, O(1) when warm
     if not prop:
         return jsonify({"error": "Property not found"}), 404
     
-    total = prop['price'] * nights
-    booking_id = len(bookings) + 1
-    booking = {
-        "id": booking_id,
-        "user_id": user['user_id'],
-        "property": prop,
-        "nights": nights,
-        "total": total,
-        "timestamp": datetime.utcnow().isoformat(),
-        "status": "confirmed"
-    }
-    bookings.append(booking)
+    booking = availability.reserve(user['user_id'], prop, check_in, check_out)
+    if not booking:
+        return jsonify({"error": "Those dates are no longer available"}), 409
+    guest = store.get_user_by_id(user['user_id'])
+    push_booking(prop, booking, guest['email'] if guest else 'Guest')
     
     return jsonify({"booking": booking, "message": "Booked successfully!"})
 
+# === AVAILABILITY (search results + property calendar) ===
+MAX_AVAILABILITY_BATCH = 200
+
+@app.route('/api/availability', methods=['POST'])
+def availability_bulk():
+    data = request.json or {}
+    ids = data.get('property_ids') or []
+    try:
+        check_in, check_out = parse_stay(data['check_in'], data.get('check_out'), data.get('nights'))
+        ids = [int(i) for i in ids]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "property_ids, check_in and check_out or nights required"}), 400
+    if len(ids) > MAX_AVAILABILITY_BATCH:
+        return jsonify({"error": f"At most {MAX_AVAILABILITY_BATCH} property_ids"}), 400
+    
+    available = availability.bulk(ids, check_in, check_out)
+    return jsonify({
+        "check_in": check_in.isoformat(),
+        "check_out": check_out.isoformat(),
+        "available": {str(pid): free for pid, free in available.items()}
+    })
+
+@app.route('/api/availability/<int:property_id>')
+def property_calendar(property_id):
+    if not store.get_property(property_id):
+        return jsonify({"error": "Property not found"}), 404
+    try:
+        start, end = parse_stay(request.args.get('from', today_utc().isoformat()),
+                                request.args.get('to'), nights=MAX_NIGHTS)
+    except ValueError:
+        return jsonify({"error": f"from (today or later) and to must be YYYY-MM-DD, at most {MAX_NIGHTS} days apart"}), 400
+    
+    return jsonify({
+        "property_id": property_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "booked": [{"check_in": a, "check_out": b} for a, b in availability.booked(property_id, start, end)]
+    })
+
+# === GUEST BOOKINGS (pages/guests/bookings.js) ===
+# History is paged newest-first by cursor (the last id of the previous page,
+# sent back as X-Next-Cursor and a Link header) over the per-user booking
+# index. Each page carries an ETag of its rows, so an unchanged page is
+# answered 304 without looking up properties or serialising anything.
+BOOKINGS_PAGE = 20
+BOOKINGS_PAGE_MAX = 100
+# A confirmed stay reads as 'completed' from its check-out day on; only then
+# can it be reviewed (and no longer cancelled). Undated bookings from before
+# the calendar ran from their booking day.
+
+def stay_status(row, today=None):
+    if row['status'] != 'confirmed':
+        return row['status']
+    check_out = row['check_out'] or (
+        date.fromisoformat(row['created_at'][:10]) + timedelta(days=row['nights'])).isoformat()
+    return 'completed' if check_out <= (today or today_utc()).isoformat() else 'confirmed'
+
+def booking_view(row):
+    prop = store.get_property(row['property_id']) or {}
+    return {
+        "id": row['id'],
+        "property_id": row['property_id'],
+        "property": prop.get('title'),
+        "location": prop.get('location'),
+        "hostId": prop.get('owner_email'),
+        "checkIn": row['check_in'],
+        "checkOut": row['check_out'],
+        "nights": row['nights'],
+        "total": row['total'],
+        "status": stay_status(row),
+        "reviewed": row['rating'] is not None,
+        "timestamp": row['created_at']
+    }
+
+def guest_booking(booking_id):
+    """The caller's booking, or None (someone else's reads as not found)."""
+    booking = store.get_booking(booking_id)
+    return booking if booking and booking['user_id'] == g.user['user_id'] else None
+
+@app.route('/api/my-bookings')
+@require_auth
+def my_bookings():
+    try:
+        cursor = int(request.args['cursor']) if 'cursor' in request.args else None
+        limit = min(max(int(request.args.get('limit', BOOKINGS_PAGE)), 1), BOOKINGS_PAGE_MAX)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    rows = store.bookings_for_user(g.user['user_id'], before=cursor, limit=limit)
+    # today_utc() is in the tag: a stay turns 'completed' without its row changing
+    etag = hashlib.sha1(repr((cursor, limit, today_utc(), [tuple(r.values()) for r in rows])).encode()).hexdigest()
+    headers = {"Cache-Control": "private, no-cache"}
+    if len(rows) == limit:
+        next_cursor = rows[-1]['id']
+        headers["X-Next-Cursor"] = str(next_cursor)
+        headers["Link"] = f'<{url_for("my_bookings", cursor=next_cursor, limit=limit)}>; rel="next"'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = jsonify([booking_view(r) for r in rows])
+        response.headers.update(headers)
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/cancel-booking/<int:booking_id>', methods=['POST'])
+@require_auth
+def cancel_booking(booking_id):
+    booking = guest_booking(booking_id)
+    if not booking:
+        return jsonify({"error": "Booking not found"}), 404
+    if stay_status(booking) == 'completed':
+        return jsonify({"error": "Booking is completed"}), 409
+    if not store.cancel_booking(booking):
+        return jsonify({"error": f"Booking is {store.get_booking(booking_id)['status']}"}), 409
+    availability.release(booking)
+
+    push_cancellation(store.get_property(booking['property_id']), booking)
+    return jsonify({"id": booking_id, "status": "cancelled", "message": "Booking cancelled"})
+
+@app.route('/api/review/<int:booking_id>', methods=['POST'])
+@require_auth
+def review_booking(booking_id):
+    data = request.json or {}
+    try:
+        rating = int(data.get('rating'))
+    except (TypeError, ValueError):
+        rating = 0
+    comment = str(data.get('comment') or '').strip()
+    if not 1 <= rating <= 5 or not comment or len(comment) > 2000:
+        return jsonify({"error": "Rating 1-5 and a comment (max 2000 chars) required"}), 400
+
+    booking = guest_booking(booking_id)
+    if not booking:
+        return jsonify({"error": "Booking not found"}), 404
+    status = stay_status(booking)
+    if status == 'confirmed':
+        return jsonify({"error": "The stay is not over yet"}), 409
+    if status != 'completed':
+        return jsonify({"error": f"A {status} booking cannot be reviewed"}), 409
+    if not store.add_review(booking, rating, comment):
+        return jsonify({"error": "Booking already reviewed"}), 409
+    return jsonify({"booking_id": booking_id, "rating": rating, "message": "Thanks for your review!"}), 201
+
 @app.route('/api/process-payment', methods=['POST'])
+@idempotency()
 def process_payment():
     data = request.json
     amount = float(data.get('amount', 0))
@@ -194,6 +740,7 @@ def process_payment():
 
 # === WESTERN UNION → JAZZCASH (PKR) ===
 @app.route('/api/wu-to-jazzcash', methods=['POST'])
+@idempotency(natural_key=mtcn_key)
 def wu_to_jazzcash():
     data = request.json
     mtcn = data.get('mtcn', '').strip()
@@ -202,38 +749,42 @@ def wu_to_jazzcash():
     if not mtcn or len(mtcn) != 10 or not mtcn.isdigit() or amount_usd <= 0:
         return jsonify({"error": "Invalid MTCN or amount"}), 400
     
-    # Live Exchange Rate
-    rate = 278.5
-    try:
-        res = requests.get(f"https://v6.exchangerate-api.com/v6/{EXCHANGE_RATE_KEY}/latest/USD")
-        data = res.json()
-        if data.get('result') == 'success':
-            rate = data['conversion_rates']['PKR']
-    except:
-        pass
-    
+    rate = rate_service.rate('PKR')
+    rate_age = rate_service.age()
     pkr_amount = round(amount_usd * rate)
     
-    deposit = {
-        "method": "Western Union",
-        "mtcn": mtcn,
-        "usd": amount_usd,
-        "pkr": pkr_amount,
-        "iban": os.getenv("JAZZCASH_IBAN"),
-        "account": os.getenv("ACCOUNT_NAME"),
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    bookings.append(deposit)
+    deposit, created = store.add_deposit(
+        "Western Union", mtcn, amount_usd, pkr_amount,
+        os.getenv("JAZZCASH_IBAN"), os.getenv("ACCOUNT_NAME")
+    )
+    if not created:  # seen before the idempotency window: never credit twice
+        return jsonify({
+            "error": "MTCN already deposited",
+            "deposit_id": deposit['id'],
+            "pkr_amount": deposit['pkr'],
+            "timestamp": deposit['timestamp']
+        }), 409
+    push_platform_stats()
     
     return jsonify({
         "success": True,
         "pkr_amount": pkr_amount,
         "iban": os.getenv("JAZZCASH_IBAN"),
         "account_name": os.getenv("ACCOUNT_NAME"),
+        "rate": rate,
+        "rate_age_seconds": None if rate_age is None else round(rate_age),
         "message": "WU converted & deposited to JazzCash in PKR"
     })
 
-# === TRANSLATION ENDPOINT (For Multi-Language) ===
+# === EXCHANGE RATES (served from memory, for the frontend) ===
+@app.route('/api/rates')
+def rates():
+    return jsonify(rate_service.snapshot()), 200, {"Cache-Control": "public, max-age=300"}
+
+# === TRANSLATION ENDPOINTS (For Multi-Language) ===
+# Both go through the per-(string, lang) store; misses are batched into one prompt.
+MAX_TRANSLATE_BATCH = 500
+
 @app.route('/api/translate', methods=['POST'])
 def translate():
     text = request.json.get('text', '')
@@ -241,42 +792,216 @@ def translate():
     if not text:
         return jsonify({"translation": text})
     
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        prompt = f"Translate exactly to {target}: '{text}'"
-        res = model.generate_content(prompt)
-        return jsonify({"translation": res.text.strip()})
-    except:
-        return jsonify({"translation": text})
+    translated, _ = translate_batch([text], target)
+    return jsonify({"translation": translated[text]})
+
+@app.route('/api/translate/batch', methods=['POST'])
+def translate_many():
+    data = request.json or {}
+    texts = data.get('texts') or []
+    target = data.get('target', 'en')
+    if not isinstance(texts, list) or len(texts) > MAX_TRANSLATE_BATCH:
+        return jsonify({"error": f"texts must be a list of at most {MAX_TRANSLATE_BATCH} strings"}), 400
+    texts = [t for t in texts if isinstance(t, str) and t]
+    if target == 'en':
+        return jsonify({"target": target, "translations": {t: t for t in texts}, "cached": len(texts)})
+    
+    translated, hits = translate_batch(texts, target)
+    return jsonify({"target": target, "translations": translated, "cached": hits})
 
 # === OWNER DASHBOARD (Real-Time Stats) ===
+# All stats come from running totals kept at write time: one row read each.
+def platform_stats_payload():
+    stats = store.get_stats()
+    return {
+        "visitors": 1234 + stats['bookings'] * 10,
+        "bookings": stats['bookings'],
+        "properties": stats['properties'],
+        "hosts": stats['hosts'],
+        "revenue": round(stats['revenue'], 2),
+        "owner_profit": round(stats['owner_profit'], 2),      # ← Property Owners
+        "platform_profit": round(stats['platform_profit'], 2), # ← You (Syed)
+        "seo_score": "98%"
+    }
+
+def owner_stats_payload(email, property_id=None):
+    if property_id:
+        stats = dict(store.get_stats('property', property_id), properties=1)
+    else:
+        stats = store.get_stats('owner', email)
+    return {
+        "properties": stats['properties'],
+        "bookings": stats['bookings'],
+        "revenue": round(stats['revenue'], 2),
+        "profit": round(stats['owner_profit'], 2),
+        "platform_profit": round(stats['platform_profit'], 2)
+    }
+
 @app.route('/api/owner-stats')
 def owner_stats():
-    total_revenue = sum(b.get('total', 0) or b.get('usd', 0) for b in bookings)
-    owner_profit = total_revenue * PROFIT_SHARE
-    platform_profit = total_revenue * (1 - PROFIT_SHARE)
+    return jsonify(platform_stats_payload())
+
+@app.route('/api/host-stats')
+@app.route('/api/property-owner-stats')
+@require_auth
+def host_stats():
+    user = store.get_user_by_id(g.user['user_id'])
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
     
-    return jsonify({
-        "visitors": 1234 + len(bookings) * 10,
-        "bookings": len(bookings),
-        "revenue": round(total_revenue, 2),
-        "owner_profit": round(owner_profit, 2),      # ← Property Owners
-        "platform_profit": round(platform_profit, 2), # ← You (Syed)
-        "seo_score": "98%"
-    })
+    property_id = request.args.get('property_id', type=int)
+    if property_id:
+        prop = store.get_property(property_id)
+        if not prop or prop.get('owner_email') != user['email']:
+            return jsonify({"error": "Property not found"}), 404
+    
+    return jsonify(owner_stats_payload(user['email'], property_id))
 
 # === AI PRICING SUGGESTION ===
+# The local model answers immediately; Gemini refines in the background and
+# its (cached) answer is served once it exists.
+AI_PRICING_REFINE = os.getenv("AI_PRICING_REFINE", "1") == "1"
+
+def pricing_prompt(location):
+    return f"Suggest optimal nightly price for a luxury villa in {location}. Return only a number."
+
+def parse_price(text):
+    return float(text.strip().replace('$', '').replace(',', ''))
+
+def refine_pricing(location):
+    try:
+        gemini.generate('gemini-1.5-pro', pricing_prompt(location))
+    except Exception:
+        pass
+
 @app.route('/api/ai-pricing', methods=['POST'])
 def ai_pricing():
-    location = request.json.get('location', 'Unknown')
-    try:
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        prompt = f"Suggest optimal nightly price for a luxury villa in {location}. Return only a number."
-        response = model.generate_content(prompt)
-        price = float(response.text.strip().replace('$', '').replace(',', ''))
-    except:
-        price = 250
-    return jsonify({"price": round(price)})
+    data = request.json or {}
+    location = data.get('location', 'Unknown')
+    sync_catalog()
+    suggestion = pricing_model.suggest(location, data.get('title'))
+    
+    if AI_PRICING_REFINE:
+        refined = gemini.cached('gemini-1.5-pro', pricing_prompt(location))
+        if refined is None:
+            socketio.start_background_task(refine_pricing, location)
+        else:
+            try:
+                return jsonify(dict(suggestion, price=round(parse_price(refined)), source="ai",
+                                    local_price=suggestion['price']))
+            except ValueError:
+                pass
+    return jsonify(suggestion)
+
+@app.route('/api/ai-pricing/bulk')
+@require_auth
+def ai_pricing_bulk():
+    sync_catalog()
+    suggestions = pricing_model.reprice_all()
+    return jsonify({"count": len(suggestions), "properties": suggestions})
+
+# === CLIENT ERROR REPORTS (core/js/self-heal.js beacons) ===
+# Ingest only counts and queues in memory; a background loop writes batches.
+MAX_CLIENT_ERROR_BYTES = 16 * 1024
+
+client_errors = ErrorCollector(
+    db,
+    max_queue=int(os.getenv("CLIENT_ERROR_QUEUE", 10000)),
+    flush_interval=float(os.getenv("CLIENT_ERROR_FLUSH_INTERVAL", 2)),
+    sample_rate=float(os.getenv("CLIENT_ERROR_SAMPLE_RATE", 1.0)),
+)
+
+@app.route('/api/client-error', methods=['POST'])
+def client_error():
+    if (request.content_length or 0) > MAX_CLIENT_ERROR_BYTES:
+        return jsonify({"error": "Report too large"}), 413
+    # sendBeacon posts the JSON as text/plain
+    report = request.get_json(force=True, silent=True)
+    if not isinstance(report, dict):
+        return jsonify({"error": "Invalid report"}), 400
+    client_errors.ingest(report)
+    return '', 204
+
+# Operators: accounts with role 'admin', plus the emails in ADMIN_EMAILS
+# (comma-separated). Every self-registered account is a 'host'.
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+def is_admin(user_id):
+    user = store.get_user_by_id(user_id)
+    return bool(user) and (user['role'] == 'admin' or user['email'].lower() in ADMIN_EMAILS)
+
+@app.route('/api/client-errors/top')
+@require_auth
+def client_errors_top():
+    if not is_admin(g.user['user_id']):
+        return jsonify({"error": "Forbidden"}), 403
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    since = request.args.get('since', type=float)
+    return jsonify({
+        "errors": client_errors.top(limit, version=request.args.get('version'), since=since),
+        "ingest": client_errors.stats()
+    })
+
+# === METRICS EXPORT (Prometheus text format) ===
+@metrics.registry.collector
+def component_samples():
+    for name, stats in (("ai_response", gemini.response_cache.stats()), ("jwt", verified_tokens.stats()),
+                        ("translation", translation_store.stats()), ("property_registry", store.registry_stats()),
+                        ("availability_calendar", availability.stats()['calendars'])):
+        yield from metrics.cache_samples(name, stats)
+
+    for name, pool in (("ai", ai_pool), ("http", http_pool), ("hash", hash_pool)):
+        stats, labels = pool.stats(), {"pool": name}
+        yield "worker_pool_running", "gauge", "Calls executing in the pool", labels, stats['running']
+        yield "worker_pool_queued", "gauge", "Calls waiting for a pool slot", labels, stats['queued']
+        for field in ("completed", "failed", "rejected", "timeouts"):
+            yield f"worker_pool_{field}_total", "counter", f"Pool calls: {field}", labels, stats[field]
+
+    flights = gemini.flights.stats()
+    yield "gemini_single_flight_in_flight", "gauge", "Distinct Gemini prompts in flight", None, flights['in_flight']
+    yield "gemini_single_flight_waiters", "gauge", "Callers waiting on another caller's Gemini call", None, flights['waiters']
+    yield "gemini_single_flight_max_waiters", "gauge", "Most callers seen waiting on one Gemini call", None, flights['max_waiters']
+    yield "gemini_single_flight_coalesced_total", "counter", "Callers that shared another call", None, flights['coalesced']
+
+    age = rate_service.age()
+    yield "exchange_rate_live", "gauge", "1 when serving fetched rates, 0 on fallback", None, int(age is not None)
+    if age is not None:
+        yield "exchange_rate_age_seconds", "gauge", "Seconds since the last successful refresh", None, age
+
+    job_stats = jobs.stats()
+    yield "jobs_queued", "gauge", "Background jobs waiting", None, job_stats['queued']
+    yield "jobs_completed_total", "counter", "Background jobs finished", None, job_stats['completed']
+    yield "jobs_failed_total", "counter", "Background jobs that raised", None, job_stats['failed']
+    yield "jobs_worker_errors_total", "counter", "Job store / on_finish errors the workers recovered from", None, job_stats['errors']
+
+    ingest = client_errors.stats()
+    for field in ("received", "sampled_out", "dropped", "flushed"):
+        yield f"client_errors_{field}_total", "counter", f"Client error reports: {field}", None, ingest[field]
+    yield "client_errors_queued", "gauge", "Client error samples waiting to be written", None, ingest['queued']
+
+    limits = limiter.stats()
+    for route_class, n in limits['limited'].items():
+        yield "rate_limited_total", "counter", "Requests refused by a token bucket", {"class": route_class}, n
+    admission = ai_admission.stats()
+    yield "ai_admission_active", "gauge", "AI-backed requests holding a slot", None, admission['active']
+    yield "ai_admission_rejected_total", "counter", "AI-backed requests refused at the cap", None, admission['rejected']
+
+    stays = availability.stats()
+    yield "bookings_reserved_total", "counter", "Stays booked through the availability engine", None, stays['reserved']
+    yield "bookings_rejected_total", "counter", "Stays refused because a night was taken", None, stays['rejected']
+
+    retries = idempotency.stats()
+    yield "idempotency_keys", "gauge", "Idempotency keys held", None, retries['keys']
+    yield "idempotency_replayed_total", "counter", "Retries answered with the stored response", None, retries['replayed']
+    yield "idempotency_conflicts_total", "counter", "Retries refused (in progress or different request)", None, retries['conflicts']
+
+    pushes = publisher.stats()
+    yield "dashboard_push_published_total", "counter", "Dashboard updates published", None, pushes['published']
+    yield "dashboard_push_emitted_total", "counter", "Dashboard events emitted after coalescing", None, pushes['emitted']
+
+@app.route('/metrics')
+def metrics_export():
+    return Response(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 # === HEALTH CHECK ===
 @app.route('/')
@@ -286,14 +1011,53 @@ def health():
         "time": datetime.utcnow().isoformat(),
         "endpoints": [
             "/api/register", "/api/login", "/api/list-property",
-            "/api/search", "/api/book", "/api/process-payment",
-            "/api/wu-to-jazzcash", "/api/translate", "/api/owner-stats"
-        ]
+            "/api/search", "/api/book", "/api/my-bookings", "/api/cancel-booking/<id>",
+            "/api/review/<id>", "/api/availability", "/api/availability/<id>", "/api/process-payment",
+            "/api/wu-to-jazzcash", "/api/rates", "/api/translate", "/api/translate/batch", "/api/owner-stats",
+            "/api/host-stats", "/api/property-owner-stats", "/api/jobs/<id>", "/api/client-error",
+            "/api/client-errors/top", "/metrics"
+        ],
+        "ai_loaded": gemini.loaded(),
+        "ai_cache": gemini.response_cache.stats(),
+        "ai_single_flight": gemini.flights.stats(),
+        "workers": {"ai": ai_pool.stats(), "http": http_pool.stats(), "hash": hash_pool.stats()},
+        "jobs": jobs.stats(),
+        "availability": availability.stats()
     })
 
+# === APP FACTORY ===
+# Importing this module only defines routes. create_app() does the startup
+# work once per process: schema + seed, catalog index, background loops.
+# The Gemini SDK is not imported here at all — it loads on first use, or in
+# the AI pool shortly after startup when AI_PRELOAD=1 — so health checks are
+# answered before the AI stack exists.
+AI_PRELOAD = os.getenv("AI_PRELOAD", "1") == "1"
+started = False
+start_lock = threading.Lock()
+
+def create_app():
+    global started
+    with start_lock:
+        if started:
+            return app
+        store.init_schema()  # auto-seeds if empty
+        client_errors.init_schema()
+        # Tables of the stores switched to SQLite (RATE_LIMIT_STORE, JOBS_DURABLE, IDEMPOTENCY_STORE)
+        for durable in (limiter.store, jobs.store, idempotency.store):
+            if hasattr(durable, 'init_schema'):
+                durable.init_schema()
+        sync_catalog()
+        rate_service.start(socketio.start_background_task, socketio.sleep)
+        jobs.start()
+        client_errors.start(socketio.start_background_task, socketio.sleep)
+        if AI_PRELOAD:
+            socketio.start_background_task(gemini.preload)
+        started = True
+    return app
+
 # === RUN SERVER ===
 if __name__ == '__main__':
     print("SYED CO-HOST AI v9999.9 — LAUNCHED @ http://localhost:5000")
     import eventlet
     eventlet.monkey_patch()
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    socketio.run(create_app(), host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
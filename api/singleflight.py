@@ -0,0 +1,69 @@
+# api/singleflight.py — coalesce concurrent identical calls into one
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """While a call for `key` is in flight, later callers wait and share its result.
+
+    The first caller (the leader) runs `fn`; everyone arriving before it
+    finishes gets the same return value or exception. Nothing is cached
+    afterwards — that is the response cache's job.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if not leader:
+            call.done.wait()
+            with self._lock:
+                call.waiters -= 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiters": sum(c.waiters for c in self._calls.values()),
+                "max_waiters": self.max_waiters,
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
@@ -0,0 +1,97 @@
+# api/socket_queue.py — Socket.IO message queue backends for multi-worker setups
+import os
+import sqlite3
+import time
+
+import socketio
+
+from api.db import database_path
+
+
+class SQLiteManager(socketio.PubSubManager):
+    """Pub/sub over a SQLite table: a stand-in for Redis on a single host.
+
+    Every worker process appends its emits/room changes to the table and
+    polls it for the others'. Rows older than `retention` seconds are pruned.
+    Good for a few workers sharing one disk; use Redis across machines.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS socketio_messages (
+        id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel    TEXT NOT NULL,
+        payload    TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, url="sqlite://", channel="flask-socketio", write_only=False, logger=None,
+                 json=None, poll_interval=0.05, retention=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = url[len("sqlite://"):] or database_path()
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._schema_ready = False  # the table is created on first connect, not at import
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        if not self._schema_ready:
+            conn.executescript(self.SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _publish(self, data):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)",
+                (self.channel, self.json.dumps(data), time.time()),
+            )
+        finally:
+            conn.close()
+
+    def _listen(self):
+        conn = self._connect()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM socketio_messages").fetchone()[0]
+        next_prune = time.time() + self.retention
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload FROM socketio_messages WHERE channel = ? AND id > ? ORDER BY id LIMIT 500",
+                (self.channel, last_id),
+            ).fetchall()
+            for row_id, payload in rows:
+                last_id = row_id
+                yield payload
+            if time.time() >= next_prune:
+                conn.execute("DELETE FROM socketio_messages WHERE created_at < ?", (time.time() - self.retention,))
+                next_prune = time.time() + self.retention
+            if not rows:
+                self.server.sleep(self.poll_interval)
+
+
+def client_manager(url, channel="flask-socketio"):
+    """Socket.IO client manager for SOCKETIO_MESSAGE_QUEUE, or None for in-process.
+
+    "sqlite://" (the app database) or "sqlite:///path" selects SQLiteManager;
+    "redis://" / "rediss://" selects python-socketio's RedisManager (needs
+    the `redis` package).
+    """
+    if not url:
+        return None
+    if url.startswith("sqlite:"):
+        return SQLiteManager(url, channel=channel)
+    if url.startswith(("redis://", "rediss://")):
+        return socketio.RedisManager(url, channel=channel)
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE: {url}")
+
+
+def socketio_options():
+    """Extra SocketIO(...) options from the environment."""
+    options = {"client_manager": client_manager(os.getenv("SOCKETIO_MESSAGE_QUEUE"))}
+    transports = os.getenv("SOCKETIO_TRANSPORTS")
+    if transports:
+        options["transports"] = [t.strip() for t in transports.split(",") if t.strip()]
+    return options
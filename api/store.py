@@ -0,0 +1,475 @@
+# api/store.py — users, properties, bookings and deposits on SQLite
+import sqlite3
+from datetime import datetime
+
+from api.ai_cache import TTLCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id         TEXT PRIMARY KEY,
+    email      TEXT NOT NULL,
+    password   TEXT NOT NULL,
+    role       TEXT NOT NULL DEFAULT 'host',
+    created_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+CREATE TABLE IF NOT EXISTS properties (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    title       TEXT NOT NULL,
+    location    TEXT NOT NULL,
+    price       NUMERIC NOT NULL,
+    owner_email TEXT,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT  -- set on every write; workers catch up on rows changed since
+);
+CREATE INDEX IF NOT EXISTS idx_properties_location ON properties(location COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_properties_owner ON properties(owner_email);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     TEXT NOT NULL,
+    property_id INTEGER NOT NULL REFERENCES properties(id),
+    nights      INTEGER NOT NULL,
+    total       NUMERIC NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'confirmed',
+    created_at  TEXT NOT NULL,
+    check_in    TEXT,  -- ISO dates, [check_in, check_out); NULL on undated
+    check_out   TEXT   -- bookings made before the availability calendar
+);
+-- Per-user booking index: entries are (user_id, id), so a guest's history
+-- is read newest-first as a range scan from a cursor id (keyset pagination)
+CREATE INDEX IF NOT EXISTS idx_bookings_user ON bookings(user_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_property ON bookings(property_id);
+
+-- Running totals maintained at write time: scope is 'global' (key ''),
+-- 'owner' (key = owner email) or 'property' (key = property id).
+-- hosts is only tracked on the global row.
+CREATE TABLE IF NOT EXISTS stats (
+    scope           TEXT NOT NULL,
+    key             TEXT NOT NULL,
+    properties      INTEGER NOT NULL DEFAULT 0,
+    bookings        INTEGER NOT NULL DEFAULT 0,
+    revenue         NUMERIC NOT NULL DEFAULT 0,
+    owner_profit    NUMERIC NOT NULL DEFAULT 0,
+    platform_profit NUMERIC NOT NULL DEFAULT 0,
+    hosts           INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS reviews (
+    booking_id  INTEGER PRIMARY KEY REFERENCES bookings(id),
+    user_id     TEXT NOT NULL,
+    property_id INTEGER NOT NULL REFERENCES properties(id),
+    rating      INTEGER NOT NULL,
+    comment     TEXT NOT NULL,
+    created_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_property ON reviews(property_id);
+
+CREATE TABLE IF NOT EXISTS deposits (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    method     TEXT NOT NULL,
+    mtcn       TEXT,
+    usd        NUMERIC NOT NULL,
+    pkr        NUMERIC NOT NULL,
+    iban       TEXT,
+    account    TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deposits_mtcn ON deposits(method, mtcn);
+"""
+
+# Run after SCHEMA: columns added since the first release, for older files
+# (CREATE TABLE IF NOT EXISTS leaves an existing table as it was)
+MIGRATIONS = {
+    "properties": [("updated_at", "TEXT")],
+    "bookings": [("check_in", "TEXT"), ("check_out", "TEXT")],
+}
+
+# Indexes on migrated columns, so also run after MIGRATIONS.
+# idx_bookings_stay: stays that block the calendar. Partial, so it only
+# holds dated, live bookings, and the overlap check is one step back from
+# the new check_out. idx_properties_updated: the change feed behind
+# properties_changed_since(); rows from before the column are backfilled.
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_bookings_stay ON bookings(property_id, check_in)
+WHERE check_in IS NOT NULL AND status != 'cancelled';
+CREATE INDEX IF NOT EXISTS idx_properties_updated ON properties(updated_at);
+UPDATE properties SET updated_at = created_at WHERE updated_at IS NULL;
+"""
+
+# The stay starting latest before `check_out`; stays never overlap, so it
+# is the only one that can end after `check_in`
+STAY_CONFLICT = (
+    "SELECT check_out FROM bookings "
+    "WHERE property_id = ? AND check_in IS NOT NULL AND status != 'cancelled' AND check_in < ? "
+    "ORDER BY check_in DESC LIMIT 1"
+)
+
+SEED_PROPERTIES = [
+    {"title": "Luxury Villa Dubai", "price": 299, "location": "Dubai"},
+    {"title": "Beach House Karachi", "price": 180, "location": "Karachi"},
+    {"title": "Mountain Cabin Murree", "price": 150, "location": "Murree"},
+]
+
+PROPERTY_COLUMNS = "id, title, location, price, owner_email"
+MAX_ID = 2 ** 63 - 1  # SQLite's largest rowid: "no cursor yet"
+STAT_FIELDS = ("properties", "bookings", "revenue", "owner_profit", "platform_profit", "hosts")
+
+BUMP_STATS = (
+    "INSERT INTO stats (scope, key, properties, bookings, revenue, owner_profit, platform_profit, hosts) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(scope, key) DO UPDATE SET "
+    "properties = properties + excluded.properties, "
+    "bookings = bookings + excluded.bookings, "
+    "revenue = revenue + excluded.revenue, "
+    "owner_profit = owner_profit + excluded.owner_profit, "
+    "platform_profit = platform_profit + excluded.platform_profit, "
+    "hosts = hosts + excluded.hosts"
+)
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+def _property(row):
+    if row is None:
+        return None
+    prop = {"id": row["id"], "title": row["title"], "location": row["location"], "price": row["price"]}
+    if row["owner_email"]:
+        prop["owner_email"] = row["owner_email"]
+    return prop
+
+
+def _stay_taken(conn, property_id, check_in, check_out):
+    row = conn.execute(STAY_CONFLICT, (property_id, check_out)).fetchone()
+    return row is not None and row["check_out"] > check_in
+
+
+def _deposit(row):
+    deposit = {k: row[k] for k in ("id", "method", "mtcn", "usd", "pkr", "iban", "account")}
+    deposit["timestamp"] = row["created_at"]
+    return deposit
+
+
+class Store:
+    """Data access for the API.
+
+    Ids are allocated by SQLite (AUTOINCREMENT inside the INSERT), so
+    concurrent requests and workers never hand out the same id.
+    get_property() keeps an id-keyed in-process registry in front of the
+    primary-key lookup. A listing only changes through update_price(),
+    which drops its entry here; other workers pick the change up from
+    properties_changed_since() (or when their entry expires, registry_ttl).
+    Anything that charges money reads the price inside its own transaction.
+    """
+
+    def __init__(self, db, profit_share=0.7, registry_size=10000, registry_ttl=300):
+        self.db = db
+        self.profit_share = profit_share
+        self._registry = TTLCache(maxsize=registry_size, ttl=registry_ttl)
+
+    def init_schema(self, seed=True):
+        self.db.executescript(SCHEMA)
+        self._migrate()
+        self.db.executescript(MIGRATED_INDEXES)
+        if not self.db.query_one("SELECT 1 AS x FROM stats LIMIT 1"):
+            self.rebuild_stats()
+        if seed and self.count_properties() == 0:
+            for prop in SEED_PROPERTIES:
+                self.add_property(prop["title"], prop["location"], prop["price"])
+
+    def _migrate(self):
+        for table, columns in MIGRATIONS.items():
+            have = {row["name"] for row in self.db.query(f"PRAGMA table_info({table})")}
+            for name, decl in columns:
+                if name not in have:
+                    try:
+                        self.db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                    except sqlite3.OperationalError:  # another worker added it first
+                        pass
+
+    # --- users ---
+    def create_user(self, user_id, email, password, role="host"):
+        """Insert a user; returns False if the email is already registered."""
+        try:
+            self.db.execute(
+                "INSERT INTO users (id, email, password, role, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, email, password, role, _now()),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get_user_by_email(self, email):
+        return self.db.query_one("SELECT id, email, password, role FROM users WHERE email = ?", (email,))
+
+    def get_user_by_id(self, user_id):
+        return self.db.query_one("SELECT id, email, password, role FROM users WHERE id = ?", (user_id,))
+
+    def update_password(self, user_id, password_hash):
+        self.db.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+
+    # --- properties ---
+    def add_property(self, title, location, price, owner_email=None):
+        with self.db.transaction() as conn:
+            now = _now()  # taken under the write lock, so updated_at follows commit order
+            cur = conn.execute(
+                "INSERT INTO properties (title, location, price, owner_email, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (title, location, price, owner_email, now, now),
+            )
+            property_id = cur.lastrowid
+            new_host = 0
+            if owner_email:
+                new_host = conn.execute(
+                    "INSERT OR IGNORE INTO stats (scope, key) VALUES ('owner', ?)", (owner_email,)
+                ).rowcount
+                self._bump(conn, "owner", owner_email, properties=1)
+            self._bump(conn, "global", "", properties=1, hosts=new_host)
+        return self.get_property(property_id)
+
+    def get_property(self, property_id):
+        prop = self._registry.get(property_id)
+        if prop is None:
+            prop = _property(self.db.query_one(
+                f"SELECT {PROPERTY_COLUMNS} FROM properties WHERE id = ?", (property_id,)
+            ))
+            if prop is not None:
+                self._registry.set(property_id, prop)
+        return prop
+
+    def update_price(self, property_id, price):
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE properties SET price = ?, updated_at = ? WHERE id = ?", (price, _now(), property_id))
+        self._registry.delete(property_id)
+        return self.get_property(property_id)
+
+    def registry_stats(self):
+        return self._registry.stats()
+
+    def filter_properties(self, location=None, min_price=None, max_price=None, limit=24):
+        """Listings matching every given filter, oldest first (filtered in SQL,
+        so a page is only short when there are no more matches)."""
+        where, params = [], []
+        if location:
+            where.append("location = ? COLLATE NOCASE")
+            params.append(location)
+        if min_price is not None:
+            where.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            where.append("price <= ?")
+            params.append(max_price)
+        rows = self.db.query(
+            f"SELECT {PROPERTY_COLUMNS} FROM properties "
+            f"{'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY id LIMIT ?",
+            (*params, limit),
+        )
+        return [_property(r) for r in rows]
+
+    def list_properties(self, offset=0, limit=20):
+        rows = self.db.query(
+            f"SELECT {PROPERTY_COLUMNS} FROM properties ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+        )
+        return [_property(r) for r in rows]
+
+    def properties_changed_since(self, since=""):
+        """(properties added or updated at or after `since`, cursor for the next call).
+
+        updated_at is stamped under the write lock, so a later commit never
+        carries an earlier stamp; rows at exactly `since` come back again,
+        which is harmless. The rows read here also refresh the registry.
+        """
+        rows = self.db.query(
+            f"SELECT {PROPERTY_COLUMNS}, updated_at FROM properties WHERE updated_at >= ? ORDER BY updated_at",
+            (since,),
+        )
+        props = []
+        for row in rows:
+            prop = _property(row)
+            self._registry.set(prop["id"], prop)
+            props.append(prop)
+        return props, rows[-1]["updated_at"] if rows else since
+
+    def count_properties(self):
+        return self.db.query_one("SELECT COUNT(*) AS n FROM properties")["n"]
+
+    # --- bookings & deposits ---
+    def add_booking(self, user_id, prop, nights, status="confirmed", check_in=None, check_out=None):
+        """Insert a booking at the current nightly price; with dates, returns
+        None if the stay overlaps another.
+
+        The price and the overlap check are read inside the write transaction
+        (BEGIN IMMEDIATE holds the write lock), so a repricing elsewhere is
+        never charged stale and two workers cannot both take the same nights.
+        """
+        created_at = _now()
+        with self.db.transaction() as conn:
+            row = conn.execute(f"SELECT {PROPERTY_COLUMNS} FROM properties WHERE id = ?", (prop["id"],)).fetchone()
+            if row is None:
+                return None
+            prop = _property(row)
+            total = prop["price"] * nights
+            if check_in is not None and _stay_taken(conn, prop["id"], check_in, check_out):
+                return None
+            cur = conn.execute(
+                "INSERT INTO bookings (user_id, property_id, nights, total, status, created_at, check_in, check_out) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, prop["id"], nights, total, status, created_at, check_in, check_out),
+            )
+            self._record_revenue(conn, total, prop)
+        return {
+            "id": cur.lastrowid,
+            "user_id": user_id,
+            "property": prop,
+            "nights": nights,
+            "total": total,
+            "check_in": check_in,
+            "check_out": check_out,
+            "timestamp": created_at,
+            "status": status,
+        }
+
+    def stay_taken(self, property_id, check_in, check_out):
+        """Whether a live booking overlaps [check_in, check_out) (ISO dates)."""
+        with self.db.connection() as conn:
+            return _stay_taken(conn, property_id, check_in, check_out)
+
+    def stays_for_property(self, property_id):
+        """(check_in, check_out) of every live dated booking, by check_in."""
+        rows = self.db.query(
+            "SELECT check_in, check_out FROM bookings "
+            "WHERE property_id = ? AND check_in IS NOT NULL AND status != 'cancelled' ORDER BY check_in",
+            (property_id,),
+        )
+        return [(r["check_in"], r["check_out"]) for r in rows]
+
+    def bookings_for_user(self, user_id, before=None, limit=20):
+        """One page of a guest's bookings, newest first, with ids < `before`.
+
+        Served from idx_bookings_user, so the cost depends on the page size,
+        not on how many bookings the guest (or the platform) has.
+        """
+        return self.db.query(
+            "SELECT b.id, b.property_id, b.nights, b.total, b.status, b.created_at, b.check_in, b.check_out, r.rating "
+            "FROM bookings b LEFT JOIN reviews r ON r.booking_id = b.id "
+            "WHERE b.user_id = ? AND b.id < ? ORDER BY b.id DESC LIMIT ?",
+            (user_id, MAX_ID if before is None else before, limit),
+        )
+
+    def get_booking(self, booking_id):
+        return self.db.query_one(
+            "SELECT id, user_id, property_id, nights, total, status, created_at, check_in, check_out "
+            "FROM bookings WHERE id = ?",
+            (booking_id,),
+        )
+
+    def cancel_booking(self, booking):
+        """Cancel a confirmed booking and take it out of the running stats.
+
+        Returns False if it was no longer confirmed (e.g. a concurrent cancel).
+        """
+        prop = self.get_property(booking["property_id"])
+        with self.db.transaction() as conn:
+            cancelled = conn.execute(
+                "UPDATE bookings SET status = 'cancelled' WHERE id = ? AND status = 'confirmed'", (booking["id"],)
+            ).rowcount
+            if cancelled:
+                self._record_revenue(conn, -booking["total"], prop, bookings=-1)
+        return bool(cancelled)
+
+    def add_review(self, booking, rating, comment):
+        """Store the guest's review; returns False if the booking already has one."""
+        try:
+            self.db.execute(
+                "INSERT INTO reviews (booking_id, user_id, property_id, rating, comment, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (booking["id"], booking["user_id"], booking["property_id"], rating, comment, _now()),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def add_deposit(self, method, mtcn, usd, pkr, iban, account):
+        """Record a transfer once; returns (deposit, created).
+
+        A transfer reference (MTCN) already on file returns the stored
+        deposit with created=False and credits nothing, so a retry can never
+        double-credit, even after the idempotency cache has forgotten it.
+        """
+        created_at = _now()
+        with self.db.transaction() as conn:
+            if mtcn:
+                row = conn.execute(
+                    "SELECT id, method, mtcn, usd, pkr, iban, account, created_at FROM deposits "
+                    "WHERE method = ? AND mtcn = ? ORDER BY id LIMIT 1", (method, mtcn),
+                ).fetchone()
+                if row is not None:
+                    return _deposit(row), False
+            cur = conn.execute(
+                "INSERT INTO deposits (method, mtcn, usd, pkr, iban, account, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (method, mtcn, usd, pkr, iban, account, created_at),
+            )
+            self._record_revenue(conn, usd)
+        return {
+            "id": cur.lastrowid,
+            "method": method,
+            "mtcn": mtcn,
+            "usd": usd,
+            "pkr": pkr,
+            "iban": iban,
+            "account": account,
+            "timestamp": created_at,
+        }, True
+
+    # --- running stats ---
+    def _bump(self, conn, scope, key, properties=0, bookings=0, revenue=0, hosts=0):
+        owner_profit = revenue * self.profit_share
+        conn.execute(BUMP_STATS, (
+            scope, key, properties, bookings, revenue, owner_profit, revenue - owner_profit, hosts,
+        ))
+
+    def _record_revenue(self, conn, amount, prop=None, bookings=1):
+        self._bump(conn, "global", "", bookings=bookings, revenue=amount)
+        if prop is not None:
+            self._bump(conn, "property", str(prop["id"]), bookings=bookings, revenue=amount)
+            if prop.get("owner_email"):
+                self._bump(conn, "owner", prop["owner_email"], bookings=bookings, revenue=amount)
+
+    def get_stats(self, scope="global", key=""):
+        """Running totals for one scope: a single primary-key read."""
+        row = self.db.query_one(
+            "SELECT properties, bookings, revenue, owner_profit, platform_profit, hosts "
+            "FROM stats WHERE scope = ? AND key = ?", (scope, str(key)),
+        )
+        return row or dict.fromkeys(STAT_FIELDS, 0)
+
+    def rebuild_stats(self):
+        """Recompute every stats row from the raw tables (first run / repair)."""
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM stats")
+            hosts = 0
+            for row in conn.execute(
+                "SELECT owner_email, COUNT(*) AS n FROM properties WHERE owner_email IS NOT NULL GROUP BY owner_email"
+            ).fetchall():
+                self._bump(conn, "owner", row["owner_email"], properties=row["n"])
+                hosts += 1
+            n_props = conn.execute("SELECT COUNT(*) FROM properties").fetchone()[0]
+            self._bump(conn, "global", "", properties=n_props, hosts=hosts)
+
+            for row in conn.execute(
+                "SELECT p.id, p.owner_email, COUNT(*) AS n, SUM(b.total) AS revenue "
+                "FROM bookings b JOIN properties p ON p.id = b.property_id "
+                "WHERE b.status != 'cancelled' GROUP BY p.id"
+            ).fetchall():
+                self._bump(conn, "global", "", bookings=row["n"], revenue=row["revenue"])
+                self._bump(conn, "property", str(row["id"]), bookings=row["n"], revenue=row["revenue"])
+                if row["owner_email"]:
+                    self._bump(conn, "owner", row["owner_email"], bookings=row["n"], revenue=row["revenue"])
+
+            n, usd = conn.execute("SELECT COUNT(*), COALESCE(SUM(usd), 0) FROM deposits").fetchone()
+            if n:
+                self._bump(conn, "global", "", bookings=n, revenue=usd)
@@ -0,0 +1,112 @@
+# api/translations.py — per-(string, lang) translation store with batched misses
+#
+# Precompute the static UI catalog at deploy time:
+#   python -m api.translations --warm ur,ar,fr,es,zh
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+
+from api import gemini
+from api.ai_cache import TTLCache
+from api.db import database_path
+from api.workers import PoolOverloaded
+
+ROOT = Path(__file__).resolve().parent.parent
+LANGUAGES = ["ur", "ar", "fr", "es", "zh"]  # matches core/js/language.js (en is the source)
+MAX_BATCH = 50  # strings per model call
+I18N_RE = re.compile(r'data-i18n="([^"]+)"')
+
+translation_store = TTLCache(
+    maxsize=int(os.getenv("TRANSLATION_CACHE_SIZE", 20000)),
+    ttl=float(os.getenv("TRANSLATION_TTL", 30 * 86400)),
+    db_path=database_path(),
+    table="translations",
+)
+
+
+def _key(text, target):
+    return f"{target}\x00{text}"
+
+
+def _parse_list(text, expected):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").partition("\n")[2]
+    try:
+        items = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(items, list) or len(items) != expected:
+        return None
+    return [str(item) for item in items]
+
+
+def _translate_misses(texts, target):
+    prompt = (
+        f"Translate each string in this JSON array to {target}. Keep the order. "
+        f"Return only a JSON array of {len(texts)} strings.\n"
+        + json.dumps(texts, ensure_ascii=False)
+    )
+    # cache=False: the per-string store below is the cache for these
+    return _parse_list(gemini.generate("gemini-1.5-flash", prompt, cache=False), len(texts))
+
+
+def translate_batch(texts, target):
+    """Translate many strings; returns ({text: translation}, cache_hits).
+
+    Strings are deduped, cached ones come from the store, and the misses go
+    to the model in combined prompts of up to MAX_BATCH strings. If a batch
+    fails its strings come back untranslated (and are not cached).
+    PoolOverloaded propagates.
+    """
+    unique = list(dict.fromkeys(t for t in texts if t))
+    result = {}
+    misses = []
+    for text in unique:
+        cached = translation_store.get(_key(text, target))
+        if cached is None:
+            misses.append(text)
+        else:
+            result[text] = cached
+
+    for i in range(0, len(misses), MAX_BATCH):
+        chunk = misses[i:i + MAX_BATCH]
+        try:
+            translated = _translate_misses(chunk, target)
+        except PoolOverloaded:
+            raise
+        except Exception:
+            translated = None
+        if translated is None:
+            result.update((text, text) for text in chunk)
+            continue
+        for text, tr in zip(chunk, translated):
+            translation_store.set(_key(text, target), tr)
+            result[text] = tr
+    return result, len(unique) - len(misses)
+
+
+def ui_catalog():
+    """Every data-i18n string in the site's HTML (the static UI catalog)."""
+    strings = set()
+    for path in ROOT.rglob("*.html"):
+        if "ai-cohost-fixed" in path.parts:
+            continue
+        strings.update(I18N_RE.findall(path.read_text(encoding="utf-8", errors="ignore")))
+    return sorted(strings)
+
+
+def warm(languages):
+    catalog = ui_catalog()
+    for lang in languages:
+        _, hits = translate_batch(catalog, lang)
+        print(f"[i18n] {lang}: {len(catalog)} strings ({hits} already cached)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute UI translations")
+    parser.add_argument("--warm", default=",".join(LANGUAGES), help="comma-separated language codes")
+    args = parser.parse_args()
+    warm([lang.strip() for lang in args.warm.split(",") if lang.strip()])
@@ -0,0 +1,187 @@
+# api/workers.py — bounded pools for blocking outbound calls (Gemini, HTTP)
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+_pools = []  # every WorkerPool; under eventlet they share tpool's OS threads
+
+
+class PoolOverloaded(Exception):
+    """Raised when a pool's queue is full; handlers answer 503."""
+
+
+class CallTimeout(Exception):
+    """Raised when a call does not finish within its timeout."""
+
+
+def _eventlet_patched():
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched("thread")
+
+
+def _size_threadpool(tpool):
+    """Give eventlet.tpool one OS thread per pool slot (it defaults to 20).
+
+    Every pool's calls run on the same tpool threads, so with fewer threads
+    than slots one pool's stuck calls would hold up the others. Only takes
+    effect before tpool starts its threads.
+    """
+    need = sum(pool.max_workers for pool in _pools)
+    if not tpool._setup_already and tpool._nthreads < need:
+        tpool.set_num_threads(need)
+
+
+class WorkerPool:
+    """Runs blocking callables off the event loop with bounded concurrency.
+
+    At most `max_workers` calls run at once and at most `max_queue` wait
+    behind them; anything beyond that is rejected with PoolOverloaded
+    instead of piling up. Under eventlet the call runs in a real OS thread
+    (eventlet.tpool) so gRPC/socket waits never block the hub. An OS thread
+    cannot be killed, so a call that times out keeps its slot until the
+    thread actually returns; callers should give the call its own deadline
+    too (e.g. the client library's request timeout).
+    """
+
+    def __init__(self, name, max_workers=8, max_queue=32, timeout=30.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._slots = None  # green semaphore, created on first green call
+        self._executor = None
+        _pools.append(self)
+
+    def call(self, fn, timeout=None):
+        """Run the zero-argument callable `fn` in the pool and return its result."""
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolOverloaded(self.name)
+            self._pending += 1
+        try:
+            result = self._run(fn, timeout)
+        except CallTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def _run(self, fn, timeout):
+        if _eventlet_patched():
+            return self._run_green(fn, timeout)
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+        future = self._executor.submit(self._tracked, fn)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise CallTimeout(f"{self.name} call exceeded {timeout}s")
+
+    def _run_green(self, fn, timeout):
+        import eventlet
+        from eventlet import tpool
+        from eventlet.semaphore import Semaphore
+
+        if self._slots is None:
+            _size_threadpool(tpool)
+            self._slots = Semaphore(self.max_workers)
+        try:
+            with eventlet.Timeout(timeout):
+                self._slots.acquire()
+                # Nothing yields between acquire and spawn, so the slot is
+                # always handed to the green thread that releases it
+                ok, result = eventlet.spawn(self._green_call, tpool, fn).wait()
+        except eventlet.Timeout:
+            raise CallTimeout(f"{self.name} call exceeded {timeout}s")
+        if not ok:
+            raise result
+        return result
+
+    def _green_call(self, tpool, fn):
+        # Holds the slot until the OS thread returns, even after a timeout.
+        # Counted here, not in the OS thread: the lock is green
+        with self._lock:
+            self._running += 1
+        try:
+            # Failures come back as values: raised here, the hub would log them
+            return True, tpool.execute(fn)
+        except Exception as e:
+            return False, e
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._slots.release()
+
+    def _tracked(self, fn):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(self._pending - self._running, 0),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+ai_pool = WorkerPool(
+    "ai",
+    max_workers=int(os.getenv("AI_POOL_SIZE", 8)),
+    max_queue=int(os.getenv("AI_POOL_QUEUE", 32)),
+    timeout=float(os.getenv("AI_CALL_TIMEOUT", 30)),
+)
+http_pool = WorkerPool(
+    "http",
+    max_workers=int(os.getenv("HTTP_POOL_SIZE", 4)),
+    max_queue=int(os.getenv("HTTP_POOL_QUEUE", 16)),
+    timeout=float(os.getenv("HTTP_CALL_TIMEOUT", 10)),
+)
+# KDF work for register/login: CPU-bound, kept apart so a login storm
+# cannot starve AI or HTTP calls (and vice versa)
+hash_pool = WorkerPool(
+    "hash",
+    max_workers=int(os.getenv("HASH_POOL_SIZE", os.cpu_count() or 2)),
+    max_queue=int(os.getenv("HASH_POOL_QUEUE", 64)),
+    timeout=float(os.getenv("HASH_CALL_TIMEOUT", 10)),
+)
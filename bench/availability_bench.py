@@ -0,0 +1,186 @@
+# bench/availability_bench.py — overlap checks and reserve-or-reject at 10k+ stays per property
+#
+#   python -m bench.availability_bench --stays 20000
+#   python -m bench.availability_bench --stays 50000 --procs 4 --threads 8 --attempts 400
+#
+# Three parts, on a throwaway SQLite file:
+#   1. Calendar.conflicts() (bisection) against a linear scan over the same
+#      stays, i.e. what filtering every booking per request costs.
+#   2. The engine's reserve() with --stays bookings already on the
+#      property: free dates (calendar check + SQL re-check + INSERT) and
+#      taken dates (calendar clash confirmed by the SQL overlap query),
+#      plus that query alone.
+#   3. Contention: --procs processes (separate engines, like workers) x
+#      --threads threads race for overlapping stays on one property. Every
+#      live booking is then checked against its neighbour. Exits 1 if two
+#      stays overlap.
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from api.availability import AvailabilityEngine, Calendar, today_utc
+from api.db import Database
+from api.store import STAY_CONFLICT, Store
+
+START = today_utc() + timedelta(days=1)
+
+
+def per_op_us(fn, n):
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t) / n * 1e6
+
+
+def open_store(path):
+    return Store(Database(path, pool_size=4))
+
+
+def seed(store, stays, seed=42):
+    """One property with `stays` back-to-back-ish bookings from START on.
+
+    Returns the property and the free gaps (day ordinals) left between them.
+    """
+    store.init_schema(seed=False)
+    prop = store.add_property("Bench Villa", "Dubai", 100, owner_email="host@bench.local")
+    rng = random.Random(seed)
+    rows, gaps, day = [], [], START.toordinal()
+    for _ in range(stays):
+        gap = rng.randint(0, 3)
+        if gap:
+            gaps.append((day, day + gap))
+        day += gap
+        nights = rng.randint(1, 7)
+        rows.append(("bench-guest", prop["id"], nights, 100 * nights, "2024-01-01T00:00:00",
+                     date.fromordinal(day).isoformat(), date.fromordinal(day + nights).isoformat()))
+        day += nights
+    with store.db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO bookings (user_id, property_id, nights, total, created_at, check_in, check_out) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+        )
+    return prop, gaps, day
+
+
+def bench_calendar(store, prop, last_day, queries):
+    stays = [(date.fromisoformat(a).toordinal(), date.fromisoformat(b).toordinal())
+             for a, b in store.stays_for_property(prop["id"])]
+    cal = Calendar(stays)
+    rng = random.Random(1)
+    probes = [(d, d + rng.randint(1, 7)) for d in (rng.randint(START.toordinal(), last_day) for _ in range(queries))]
+    linear = lambda a, b: any(s < b and e > a for s, e in stays)
+    assert all(cal.conflicts(a, b) == linear(a, b) for a, b in probes[:200])
+    it = iter(probes)
+    bisect_us = per_op_us(lambda: cal.conflicts(*next(it)), queries)
+    it = iter(probes)
+    linear_us = per_op_us(lambda: linear(*next(it)), min(queries, 2000))
+    return len(cal), bisect_us, linear_us
+
+
+def bench_reserve(store, prop, gaps, n):
+    engine = AvailabilityEngine(store)
+    t = time.perf_counter()
+    engine.calendar(prop["id"])
+    load_ms = (time.perf_counter() - t) * 1000
+
+    free = random.Random(2).sample(gaps, min(n, len(gaps)))
+    it = iter(free)
+    free_us = per_op_us(lambda: engine.reserve("bench", prop, *(date.fromordinal(d) for d in next(it))), len(free))
+    taken = iter([(date.fromordinal(a), date.fromordinal(b)) for a, b in free])
+    taken_us = per_op_us(lambda: engine.reserve("bench", prop, *next(taken)), len(free))
+
+    probe = iter(random.Random(3).sample(gaps, min(n, len(gaps))))
+    with store.db.connection() as conn:
+        sql_us = per_op_us(lambda: conn.execute(
+            STAY_CONFLICT, (prop["id"], date.fromordinal(next(probe)[1]).isoformat())).fetchone(),
+            min(n, len(gaps)))
+        plan = conn.execute("EXPLAIN QUERY PLAN " + STAY_CONFLICT, (prop["id"], START.isoformat())).fetchall()
+    return load_ms, free_us, taken_us, sql_us, plan[0][-1], engine.stats()
+
+
+def contend(path, property_id, window, threads, attempts, seed, results):
+    store = open_store(path)
+    engine = AvailabilityEngine(store)
+    prop = store.get_property(property_id)
+    counts = {"reserved": 0, "rejected": 0}
+    lock = threading.Lock()
+
+    def run(i):
+        rng = random.Random(f"{seed}:{i}")
+        for _ in range(attempts):
+            day = window[0] + rng.randint(0, window[1] - window[0])
+            ok = engine.reserve(f"guest{seed}", prop, date.fromordinal(day), date.fromordinal(day + rng.randint(1, 5)))
+            with lock:
+                counts["reserved" if ok else "rejected"] += 1
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(counts)
+
+
+def overlaps(store, property_id):
+    stays = store.stays_for_property(property_id)
+    return sum(1 for (_, end), (start, _) in zip(stays, stays[1:]) if start < end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Availability engine benchmark")
+    parser.add_argument("--stays", type=int, default=20000, help="bookings already on the property")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--reserves", type=int, default=500)
+    parser.add_argument("--procs", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--attempts", type=int, default=200, help="reservations tried per thread")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "availability.sqlite3")
+    store = open_store(path)
+    prop, gaps, last_day = seed(store, args.stays)
+
+    n, bisect_us, linear_us = bench_calendar(store, prop, last_day, args.queries)
+    print(f"calendar: {n} stays")
+    print(f"  conflicts() bisect   {bisect_us:8.2f} µs/op")
+    print(f"  linear scan          {linear_us:8.2f} µs/op  ({linear_us / bisect_us:.0f}x)")
+
+    load_ms, free_us, taken_us, sql_us, plan, stats = bench_reserve(store, prop, gaps, args.reserves)
+    print(f"reserve() with {args.stays} stays (calendar load {load_ms:.1f} ms)")
+    print(f"  free dates → booked  {free_us:8.1f} µs/op")
+    print(f"  taken → rejected     {taken_us:8.1f} µs/op")
+    print(f"  SQL overlap check    {sql_us:8.1f} µs/op  [{plan}]")
+    print(f"  {stats['reserved']} reserved, {stats['rejected']} rejected")
+
+    # Contention: a 60-day window past the seeded stays, far too small for everyone
+    window = (last_day + 10, last_day + 70)
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=contend, args=(path, prop["id"], window, args.threads, args.attempts, i, results))
+             for i in range(args.procs)]
+    t = time.perf_counter()
+    for p in procs:
+        p.start()
+    totals = {"reserved": 0, "rejected": 0}
+    for _ in procs:
+        for key, value in results.get().items():
+            totals[key] += value
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - t
+    tried = totals["reserved"] + totals["rejected"]
+    bad = overlaps(store, prop["id"])
+    print(f"contention: {args.procs} procs x {args.threads} threads, {tried} attempts in {wall:.2f}s "
+          f"({tried / wall:.0f}/s): {totals['reserved']} reserved, {totals['rejected']} rejected")
+    print(f"  overlapping stays: {bad}")
+    print("PASS" if not bad else "FAIL")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# bench/bookings_check.py — guest booking lifecycle rules, against the real app
+#
+#   python -m bench.bookings_check
+#
+# Runs api.server in-process (Flask test client) on a throwaway SQLite file
+# and checks that a stay only becomes reviewable once it is over:
+#   - reviewing a confirmed stay whose check-out is still ahead → 409;
+#   - a stay past its check-out is listed as 'completed', can be reviewed
+#     once (201, then 409) and can no longer be cancelled;
+#   - a future stay can still be cancelled, and then not reviewed.
+# Exits 1 on any failure.
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+GUEST = {"email": "guest@bench.local", "password": "guest-password-123"}
+
+
+def run_checks():
+    from api import server
+    from api.availability import today_utc
+
+    client = server.create_app().test_client()
+    client.post("/api/register", json=GUEST)
+    token = client.post("/api/login", json=GUEST).get_json()["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    day = lambda n: (today_utc() + timedelta(days=n)).isoformat()
+    review = lambda booking_id: client.post(f"/api/review/{booking_id}", json={"rating": 5, "comment": "Lovely"},
+                                            headers=auth).status_code
+
+    future = client.post("/api/book", json={"property_id": 1, "check_in": day(10), "nights": 2},
+                         headers=auth).get_json()["booking"]["id"]
+    # A finished stay: booking in the past is not allowed, so write its dates directly
+    past = client.post("/api/book", json={"property_id": 1, "check_in": day(30), "nights": 2},
+                       headers=auth).get_json()["booking"]["id"]
+    server.db.execute("UPDATE bookings SET check_in = ?, check_out = ? WHERE id = ?", (day(-5), day(-3), past))
+    listed = {b["id"]: b["status"] for b in client.get("/api/my-bookings", headers=auth).get_json()}
+
+    checks = [
+        ("review of a future stay is rejected", review(future) == 409),
+        ("a finished stay is listed as completed", listed.get(past) == "completed"),
+        ("a future stay is listed as confirmed", listed.get(future) == "confirmed"),
+        ("a finished stay can be reviewed", review(past) == 201),
+        ("a finished stay is reviewed only once", review(past) == 409),
+        ("a finished stay cannot be cancelled",
+         client.post(f"/api/cancel-booking/{past}", headers=auth).status_code == 409),
+        ("a future stay can be cancelled",
+         client.post(f"/api/cancel-booking/{future}", headers=auth).status_code == 200),
+        ("a cancelled stay cannot be reviewed", review(future) == 409),
+    ]
+    return checks
+
+
+def main():
+    os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "bookings_check.sqlite3"))
+    os.environ.setdefault("SECRET_KEY", "bookings-check-secret-key-0123456789")
+    os.environ["RATE_LIMITS"] = "0"
+    os.environ["AI_PRELOAD"] = "0"
+
+    ok = True
+    for name, passed in run_checks():
+        ok = ok and passed
+        print(f"  {'ok' if passed else 'FAIL':<6}{name}")
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# bench/broadcast_check.py — do room broadcasts reach sockets held by another worker?
+#
+#   python -m bench.broadcast_check                    # SQLite queue (default)
+#   python -m bench.broadcast_check --queue redis://localhost:6379/0
+#   python -m bench.broadcast_check --queue none       # control: expected to FAIL
+#
+# Starts two stub API workers (bench/stubs.py) on one database and message
+# queue, then checks, with a socket on each worker:
+#   - a booking made through worker B reaches the host's dashboard socket on
+#     worker A (owner room: new_booking + stats_update), exactly once;
+#   - a deposit made through worker A reaches the platform dashboard on
+#     worker B (platform room: owner_stats), exactly once.
+# Exits 1 on any missing or duplicated delivery.
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import requests
+import socketio
+
+from bench.suite import ROOT, free_port
+
+HOST = {"email": "host@bench.local", "password": "host-password-123"}
+GUEST = {"email": "guest@bench.local", "password": "guest-password-123"}
+SETTLE = 2.0  # seconds to wait for deliveries (dashboard pushes are coalesced)
+
+
+def start_worker(env):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bench.stubs", "--port", str(port), "--listings", "0"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"worker exited with {proc.returncode}")
+        try:
+            if requests.get(url + "/", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("worker did not come up within 120s")
+
+
+class Listener:
+    """A dashboard socket that records every event it receives."""
+
+    def __init__(self, url, token, events):
+        self.received = {event: [] for event in events}
+        self.client = socketio.Client(reconnection=False)
+        for event in events:
+            self.client.on(event, self._recorder(event))
+        self.client.connect(url, auth={"token": token}, transports=["polling"], wait_timeout=10)
+
+    def _recorder(self, event):
+        def record(data=None):
+            self.received[event].append(data)
+        return record
+
+    def join(self, payload):
+        self.client.emit("dashboard_join", payload)
+
+    def reset(self):
+        for events in self.received.values():
+            events.clear()
+
+
+def account(url, creds):
+    requests.post(url + "/api/register", json=creds)
+    return requests.post(url + "/api/login", json=creds).json()["token"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-worker Socket.IO broadcast check")
+    parser.add_argument("--queue", default="sqlite://", help="SOCKETIO_MESSAGE_QUEUE, or 'none'")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        DATABASE_PATH=os.path.join(tempfile.mkdtemp(), "broadcast.sqlite3"),
+        SECRET_KEY="broadcast-check-secret-key-0123456789",
+    )
+    env.pop("SOCKETIO_MESSAGE_QUEUE", None)
+    if args.queue != "none":
+        env["SOCKETIO_MESSAGE_QUEUE"] = args.queue
+
+    procs = []
+    try:
+        proc_a, url_a = start_worker(env)
+        procs.append(proc_a)
+        proc_b, url_b = start_worker(env)
+        procs.append(proc_b)
+
+        host_token = account(url_a, HOST)
+        guest_token = account(url_b, GUEST)
+        listed = requests.post(url_a + "/api/list-property", data={
+            "title": "Broadcast Villa", "location": "Dubai", "price": "300",
+        }, headers={"Authorization": f"Bearer {host_token}"}).json()["property"]
+
+        host = Listener(url_a, host_token, ["new_booking", "stats_update"])
+        host.join({"token": host_token})
+        platform = Listener(url_b, guest_token, ["owner_stats"])
+        platform.join({"scope": "platform"})
+        time.sleep(SETTLE)  # join snapshots
+        host.reset()
+        platform.reset()
+
+        checks = []
+        requests.post(url_b + "/api/book", json={"property_id": listed["id"], "nights": 2,
+                                                   "check_in": (date.today() + timedelta(days=1)).isoformat()},
+                      headers={"Authorization": f"Bearer {guest_token}"}).raise_for_status()
+        time.sleep(SETTLE)
+        checks.append(("booking on B → host socket on A: new_booking", len(host.received["new_booking"])))
+        checks.append(("booking on B → host socket on A: stats_update", len(host.received["stats_update"])))
+
+        platform.reset()
+        requests.post(url_a + "/api/wu-to-jazzcash", json={"mtcn": "1234567890", "amount_usd": 50}).raise_for_status()
+        time.sleep(SETTLE)
+        checks.append(("deposit on A → platform socket on B: owner_stats", len(platform.received["owner_stats"])))
+
+        for listener in (host, platform):
+            listener.client.disconnect()
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait(10)
+
+    ok = True
+    print(f"queue: {args.queue}")
+    for name, count in checks:
+        status = "ok" if count == 1 else ("MISSING" if count == 0 else f"DUPLICATED x{count}")
+        ok &= count == 1
+        print(f"  {status:<14}{name}")
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
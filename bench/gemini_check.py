@@ -0,0 +1,65 @@
+# bench/gemini_check.py — api.gemini against the stub model, as bench.suite uses it
+#
+#   python -m bench.gemini_check
+#   python -m bench.gemini_check --eventlet    # calls go through eventlet.tpool
+#
+# Runs gemini.generate() and gemini.stream() on bench/stubs.py's StubGenAI
+# and checks that they return the stub's reply (not an exception turned into
+# a caller's fallback) and that each call carried the pool's deadline in
+# request_options. Exits 1 on any failure.
+import argparse
+import os
+import sys
+import tempfile
+
+
+def run_checks():
+    from api import gemini
+    from api.workers import ai_pool
+    from bench import stubs
+
+    stubs.install(latency=0.01)
+    prompt = "Hello, is the villa free next week?"
+    expected = stubs.stub_reply(prompt)
+    checks = []
+
+    try:
+        text = gemini.generate("gemini-check", prompt, cache=False)
+    except Exception as e:
+        text = f"{type(e).__name__}: {e}"
+    checks.append(("generate() returns the stub reply", text == expected, text))
+    options = getattr(gemini.get_model("gemini-check"), "request_options", None)
+    checks.append(("generate() passes the pool deadline", options == {"timeout": ai_pool.timeout}, options))
+
+    gemini.get_model("gemini-check").request_options = None
+    try:
+        streamed = "".join(gemini.stream("gemini-check", prompt)).strip()
+    except Exception as e:
+        streamed = f"{type(e).__name__}: {e}"
+    checks.append(("stream() yields the stub reply", streamed == expected, streamed))
+    options = getattr(gemini.get_model("gemini-check"), "request_options", None)
+    checks.append(("stream() passes the pool deadline", options == {"timeout": ai_pool.timeout}, options))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check api.gemini against the stub model")
+    parser.add_argument("--eventlet", action="store_true", help="monkey-patch first, like the server")
+    args = parser.parse_args()
+
+    if args.eventlet:
+        import eventlet
+        eventlet.monkey_patch()
+    os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "gemini_check.sqlite3"))
+    os.environ.pop("AI_CACHE_DB", None)
+
+    ok = True
+    for name, passed, got in run_checks():
+        ok = ok and passed
+        print(f"  {'ok' if passed else 'FAIL':<6}{name}" + ("" if passed else f"  (got {got!r})"))
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
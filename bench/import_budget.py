@@ -0,0 +1,68 @@
+# bench/import_budget.py — cold-start budget for the API process
+#
+#   python -m bench.import_budget --budget 1.0
+#
+# In a fresh interpreter: times `import api.server` and create_app(), then
+# answers GET / and checks the heavy dependencies (Gemini SDK, gRPC, numpy)
+# were still not imported. Exits 1 if the import exceeds the budget or
+# anything heavy was loaded eagerly.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# requests is not listed: python-socketio's engine.io client imports it anyway
+HEAVY = ("google.generativeai", "grpc", "numpy")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import api.server as server
+t1 = time.perf_counter()
+app = server.create_app()
+t2 = time.perf_counter()
+response = app.test_client().get("/")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "create_app_s": t2 - t1,
+    "first_health_s": t3 - t2,
+    "health_status": response.status_code,
+    "loaded": [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=1.0, help="max seconds for `import api.server`")
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of N cold starts")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        DATABASE_PATH=os.path.join(tempfile.mkdtemp(), "bench.sqlite3"),
+        AI_PRELOAD="0",
+        EXCHANGE_RATE_URL="http://127.0.0.1:9/",  # never reached: the refresh loop is not scheduled here
+    )
+    code = f"HEAVY = {HEAVY!r}\n{PROBE}"
+    results = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(results, key=lambda r: r["import_s"])
+
+    print(f"import api.server: {best['import_s'] * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+    print(f"create_app():      {best['create_app_s'] * 1000:.0f} ms")
+    print(f"first GET /:       {best['first_health_s'] * 1000:.0f} ms → {best['health_status']}")
+    print(f"heavy modules loaded: {best['loaded'] or 'none'}")
+
+    ok = best["import_s"] <= args.budget and not best["loaded"] and best["health_status"] == 200
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
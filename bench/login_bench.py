@@ -0,0 +1,69 @@
+# bench/login_bench.py — logins/sec through /api/login at a given concurrency
+#
+#   python -m bench.login_bench --concurrency 16 --logins 400
+#
+# Runs against an in-process app on a throwaway SQLite file. With --eventlet
+# the process is monkey-patched first, as under `gunicorn -k eventlet`, so
+# the numbers include the hash pool's tpool offload.
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--eventlet", action="store_true")
+    args = parser.parse_args()
+
+    if args.eventlet:
+        import eventlet
+        eventlet.monkey_patch()
+
+    os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key-bench-secret-key")
+    os.environ.setdefault("RATE_LIMITS", "0")  # one client, many logins: measure hashing, not the limiter
+    os.environ.setdefault("AI_PRELOAD", "0")
+    from api.server import create_app
+    from api.credentials import SCRYPT_N, SCRYPT_P, SCRYPT_R
+
+    app = create_app()
+    client = app.test_client()
+    creds = {"email": "bench@example.com", "password": "correct horse battery staple"}
+    client.post("/api/register", json=creds)
+
+    statuses = {}
+    lock = threading.Lock()
+    remaining = [args.logins]
+
+    def worker():
+        local = app.test_client()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            code = local.post("/api/login", json=creds).status_code
+            with lock:
+                statuses[code] = statuses.get(code, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"scrypt N={SCRYPT_N} r={SCRYPT_R} p={SCRYPT_P}, concurrency={args.concurrency}")
+    print(f"{args.logins} logins in {elapsed:.2f}s → {args.logins / elapsed:.1f} logins/sec")
+    print(f"status codes: {statuses}")
+    return 0 if statuses.get(200) == args.logins else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
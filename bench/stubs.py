@@ -0,0 +1,140 @@
+# bench/stubs.py — the real API with deterministic Gemini and exchange-rate stubs
+#
+#   python -m bench.stubs --port 5055 --gemini-latency 0.05 --listings 2000
+#
+# Serves api.server under eventlet (as in production) on a throwaway SQLite
+# file. The Gemini SDK is replaced by StubGenAI, which answers every prompt
+# the app sends with a fixed, well-formed reply after `latency` seconds, and
+# EXCHANGE_RATE_URL points at a static JSON file served locally. Used by
+# bench/suite.py; rate limits are off because every request comes from one IP.
+import argparse
+import atexit
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    from eventlet.patcher import original
+    _sleep = original("time").sleep  # stub calls run in real OS threads (tpool)
+except ImportError:
+    _sleep = time.sleep
+
+STUB_RATES = {"result": "success", "base_code": "USD", "rates": {"USD": 1, "PKR": 278.5, "EUR": 0.92, "AED": 3.67}}
+TITLE_WORDS = ["Luxury", "Cozy", "Modern", "Beach", "Mountain", "Family", "Garden", "Lake", "City", "Desert"]
+KINDS = ["Villa", "House", "Cabin", "Apartment", "Studio", "Loft", "Cottage", "Penthouse"]
+LOCATIONS = ["Dubai", "Karachi", "Lahore", "Murree", "Islamabad", "Hunza", "Skardu", "Gwadar"]
+
+RANK_RE = re.compile(r"^(\d+):", re.MULTILINE)
+# In every free-text stub reply, so a benchmark can tell a real (stubbed)
+# answer from the app's fallbacks ("AI is thinking... Try again.", busy, ...)
+STUB_MARKER = "[stub]"
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+def stub_reply(prompt):
+    """A deterministic answer in the shape each caller parses."""
+    if "Rank these properties" in prompt:
+        return ", ".join(reversed(RANK_RE.findall(prompt)))
+    if prompt.startswith("Translate each string"):
+        target = prompt.split(" to ", 1)[1].split(".", 1)[0]
+        texts = json.loads(prompt.split("\n", 1)[1])
+        return json.dumps([f"[{target}] {t}" for t in texts], ensure_ascii=False)
+    if "Return only a number" in prompt:
+        return "321"
+    return f"{STUB_MARKER} Stub reply ({len(prompt)} chars): happy to help with your stay."
+
+
+class StubModel:
+    def __init__(self, name, latency):
+        self.name = name
+        self.latency = latency
+        self.request_options = None  # as passed on the last call
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        self.request_options = request_options
+        _sleep(self.latency)
+        text = stub_reply(prompt)
+        if stream:
+            return iter([_Response(word + " ") for word in text.split(" ")])
+        return _Response(text)
+
+
+class StubGenAI:
+    """Stands in for the google.generativeai module."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+
+    def configure(self, **kwargs):
+        pass
+
+    def GenerativeModel(self, name):
+        return StubModel(name, self.latency)
+
+
+def install(latency):
+    from api import gemini
+    gemini._genai = StubGenAI(latency)
+
+
+def serve_rates():
+    """Serve STUB_RATES from a local static file server; returns its URL."""
+    root = tempfile.mkdtemp()
+    with open(os.path.join(root, "rates.json"), "w") as f:
+        json.dump(STUB_RATES, f)
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "-m", "http.server", "0", "--bind", "127.0.0.1", "--directory", root],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    atexit.register(proc.terminate)
+    # "Serving HTTP on 127.0.0.1 port 41234 (http://127.0.0.1:41234/) ..."
+    port = int(re.search(r"port (\d+)", proc.stdout.readline()).group(1))
+    return f"http://127.0.0.1:{port}/rates.json"
+
+
+def seed_listings(store, n, seed=42):
+    rng = random.Random(seed)
+    for i in range(n):
+        title = f"{rng.choice(TITLE_WORDS)} {rng.choice(KINDS)} {i}"
+        store.add_property(title, rng.choice(LOCATIONS), rng.randint(40, 600), owner_email=f"host{i % 50}@bench.local")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with deterministic stubs")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="seconds per stub model call")
+    parser.add_argument("--listings", type=int, default=2000, help="extra listings to seed")
+    args = parser.parse_args()
+
+    import eventlet
+    eventlet.monkey_patch()
+
+    # DATABASE_PATH may be preset so several stub workers share one database
+    os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "bench.sqlite3"))
+    os.environ["EXCHANGE_RATE_URL"] = serve_rates()
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key-bench-secret-key")
+    os.environ["RATE_LIMITS"] = "0"
+    os.environ["AI_PRELOAD"] = "0"
+    os.environ.pop("AI_CACHE_DB", None)
+
+    from api import server
+    install(args.gemini_latency)
+    app = server.create_app()
+    seed_listings(server.store, args.listings)
+    server.sync_catalog()
+
+    print(f"[bench] stub API on http://127.0.0.1:{args.port} (pid {os.getpid()})", flush=True)
+    server.socketio.run(app, host="127.0.0.1", port=args.port, debug=False, log_output=False)
+
+
+if __name__ == "__main__":
+    main()
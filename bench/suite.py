@@ -0,0 +1,342 @@
+# bench/suite.py — load the REST and Socket.IO surface, report latency percentiles
+#
+#   python -m bench.suite --concurrency 16 --requests 2000
+#   python -m bench.suite --scenarios search,ai_search --gemini-latency 0.2
+#   python -m bench.suite --url http://127.0.0.1:5000      # an instance you started
+#   python -m bench.suite --compare bench/results/a.json bench/results/b.json
+#
+# By default starts bench/stubs.py (real app, stubbed Gemini and rates) on a
+# free port, runs each scenario with N requests spread over C client
+# threads, and writes req/s, p50/p95/p99 and server memory to
+# bench/results/suite-<utc time>.json. Same flags → same request mix.
+# A request only counts as a success if it got the real answer: against the
+# stubs, a chat reply must carry the stub's marker, so a fallback reply is an
+# error. Exits 1 if any scenario had errors.
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import requests
+
+from bench.stubs import STUB_MARKER
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+SCENARIOS = ["search", "book", "owner_stats", "login", "user_message", "ai_search"]
+QUERIES = ["villa", "beach house", "dubai", "mountain cabin", "luxury karachi", "cozy loft", "lake", "studio lahore"]
+PROMPTS = ["Is parking included?", "Best time to visit Hunza?", "Can I check in early?", "Any pets allowed?"]
+CREDS = {"email": "bench@bench.local", "password": "bench-password-123"}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory_of(pid):
+    """Current and peak resident set size of `pid` in MiB (Linux /proc)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    kib = lambda key: int(fields[key].split()[0]) if key in fields else 0
+    return {"rss_mb": round(kib("VmRSS") / 1024, 1), "peak_rss_mb": round(kib("VmHWM") / 1024, 1)}
+
+
+def start_server(args):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bench.stubs", "--port", str(port),
+         "--gemini-latency", str(args.gemini_latency), "--listings", str(args.listings)],
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT,
+                           DATABASE_PATH=os.path.join(tempfile.mkdtemp(), "bench.sqlite3")),
+        stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"stub server exited with {proc.returncode} (run with --verbose)")
+        try:
+            if requests.get(url + "/", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("stub server did not come up within 120s")
+
+
+# --- scenarios: make_worker() builds per-thread state; op(worker, rng) -> ok ---
+class Http:
+    def __init__(self, url, token=None):
+        self.url = url
+        self.session = requests.Session()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def close(self):
+        self.session.close()
+
+
+class SocketWorker:
+    """One Socket.IO connection; op() emits and waits for the reply event."""
+
+    def __init__(self, url, token, transport, reply_event):
+        import socketio
+
+        self.client = socketio.Client(reconnection=False)
+        self.reply = threading.Event()
+        self.last = None
+        self.client.on(reply_event, self._on_reply)
+        self.client.connect(url, auth={"token": token}, transports=[transport], wait_timeout=10)
+
+    def _on_reply(self, data=None):
+        if isinstance(data, dict) and data.get("stage") == "rerank":
+            return  # ai_search: time the local answer; the rerank arrives later
+        self.last = data
+        self.reply.set()
+
+    def ask(self, event, payload, timeout=30):
+        self.reply.clear()
+        self.client.emit(event, payload)
+        return self.reply.wait(timeout)
+
+    def close(self):
+        self.client.disconnect()
+
+
+def op_search(w, rng):
+    r = w.session.post(w.url + "/api/search", json={"query": rng.choice(QUERIES), "per_page": 20})
+    return r.status_code == 200
+
+
+def op_book(w, rng):
+    check_in = date.today() + timedelta(days=rng.randint(1, 1000))
+    r = w.session.post(w.url + "/api/book", json={
+        "property_id": rng.choice(w.property_ids), "check_in": check_in.isoformat(), "nights": rng.randint(1, 7),
+    })
+    return r.status_code in (200, 409)  # 409: the dates were already taken
+
+
+def op_owner_stats(w, rng):
+    return w.session.get(w.url + "/api/owner-stats").status_code == 200
+
+
+def op_login(w, rng):
+    return w.session.post(w.url + "/api/login", json=CREDS).status_code == 200
+
+
+def op_user_message(w, rng):
+    if not w.ask("user_message", {"prompt": rng.choice(PROMPTS)}):
+        return False
+    reply = w.last if isinstance(w.last, dict) else {}
+    if w.expect_marker:
+        # Only the stub model's answer counts; a fallback, error or busy reply is a failure
+        return STUB_MARKER in str(reply.get("response", ""))
+    return bool(reply.get("response")) and not reply.get("busy")
+
+
+def op_ai_search(w, rng):
+    return w.ask("ai_search", {"query": rng.choice(QUERIES), "filters": {}})
+
+
+def make_worker(name, ctx):
+    if name == "user_message":
+        worker = SocketWorker(ctx["url"], ctx["token"], ctx["transport"], "ai_response")
+        worker.expect_marker = ctx["stubbed"]
+        return worker
+    if name == "ai_search":
+        return SocketWorker(ctx["url"], ctx["token"], ctx["transport"], "search_results")
+    worker = Http(ctx["url"], ctx["token"] if name == "book" else None)
+    worker.property_ids = ctx["property_ids"]
+    return worker
+
+
+OPS = {
+    "search": op_search, "book": op_book, "owner_stats": op_owner_stats,
+    "login": op_login, "user_message": op_user_message, "ai_search": op_ai_search,
+}
+
+
+def run_scenario(name, ctx, args, server_pid):
+    workers = [make_worker(name, ctx) for _ in range(args.concurrency)]
+    latencies, failures, lock = [], [0], threading.Lock()
+    remaining = [args.warmup + args.requests]
+    measured_from = []  # start of the first measured request
+
+    def loop(i):
+        rng = random.Random(f"{args.seed}:{name}:{i}")
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                warm = remaining[0] >= args.requests
+                start = time.perf_counter()
+                if not warm and not measured_from:
+                    measured_from.append(start)
+            try:
+                ok = OPS[name](workers[i], rng)
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if warm:
+                continue
+            with lock:
+                latencies.append(elapsed)
+                failures[0] += not ok
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - (measured_from[0] if measured_from else started)
+    for w in workers:
+        w.close()
+
+    latencies.sort()
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "errors": failures[0],
+        "wall_s": round(wall, 3),
+        "rps": round(len(latencies) / wall, 1) if wall else None,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else None,
+        "server_memory": memory_of(server_pid) if server_pid else None,
+    }
+
+
+def prepare(url, transport, stubbed):
+    requests.post(url + "/api/register", json=CREDS)
+    token = requests.post(url + "/api/login", json=CREDS).json()["token"]
+    ids = [p["id"] for p in requests.post(url + "/api/search", json={"query": "", "per_page": 100}).json()["properties"]]
+    return {"url": url, "token": token, "property_ids": ids, "transport": transport, "stubbed": stubbed}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'scenario':<14}{'req/s':>24}{'p95 ms':>24}{'p99 ms':>24}")
+    for name, after in new["scenarios"].items():
+        before = old["scenarios"].get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ("rps", "p95_ms", "p99_ms"):
+            a, b = before.get(key), after.get(key)
+            change = f"{(b - a) / a * 100:+.0f}%" if a and b is not None else "n/a"
+            cells.append(f"{a} → {b} ({change})")
+        print(f"{name:<14}" + "".join(f"{c:>24}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="REST + Socket.IO benchmark suite")
+    parser.add_argument("--url", help="benchmark a running instance instead of starting bench.stubs")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--transport", default="polling", choices=["polling", "websocket"],
+                        help="Socket.IO transport (websocket needs the websocket-client package)")
+    parser.add_argument("--gemini-latency", type=float, default=0.05)
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--seed", default="42")
+    parser.add_argument("--out", help="results file (default bench/results/suite-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(OPS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    proc = None
+    url = args.url
+    if not url:
+        proc, url = start_server(args)
+    try:
+        ctx = prepare(url.rstrip("/"), args.transport, stubbed=proc is not None)
+        server_pid = proc.pid if proc else None
+        results = {
+            "meta": {
+                "time": datetime.utcnow().isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "url": None if proc else url,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "warmup": args.warmup,
+                "transport": args.transport,
+                "gemini_latency": args.gemini_latency if proc else None,
+                "listings": args.listings if proc else None,
+                "seed": args.seed,
+                "server_memory_start": memory_of(server_pid) if server_pid else None,
+            },
+            "scenarios": {},
+        }
+        print(f"{'scenario':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'rss MiB':>9}")
+        for name in names:
+            r = run_scenario(name, ctx, args, server_pid)
+            results["scenarios"][name] = r
+            rss = (r["server_memory"] or {}).get("rss_mb", "-")
+            print(f"{name:<14}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['errors']:>8}{rss:>9}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(10)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"suite-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"saved {out}")
+    failed = [name for name, r in results["scenarios"].items() if r["errors"]]
+    if failed:
+        print(f"FAIL: errors in {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
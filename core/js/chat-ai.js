@@ -4,7 +4,7 @@ const API_URL = "https://syedcohost.onrender.com";
 export function initRealtimeChat() {
   try {
     const socket = io(API_URL, {
-      transports: ["websocket", "polling"],
+      transports: ["websocket"],
       reconnection: true
     });
 
@@ -31,6 +31,10 @@ export function initRealtimeChat() {
     // Attach bubble click
     bubble.addEventListener("click", toggleChat);
 
+    // Streaming replies: one <p> per message id, filled chunk by chunk
+    const streams = {};
+    let nextId = 0;
+
     // User sending message
     input.addEventListener("keypress", (e) => {
       if (e.key === "Enter" && input.value.trim()) {
@@ -38,13 +42,39 @@ export function initRealtimeChat() {
         body.innerHTML += `
           <p class="user-msg"><strong>You:</strong> ${msg}</p>
         `;
-        socket.emit("user_message", { prompt: msg });
+        socket.emit("user_message", { prompt: msg, stream: true, id: `m${nextId++}` });
         input.value = "";
         body.scrollTop = body.scrollHeight;
       }
     });
 
-    // AI reply
+    const streamTarget = (id) => {
+      if (!streams[id]) {
+        const p = document.createElement("p");
+        p.className = "ai-msg streaming";
+        p.innerHTML = "<strong>AI:</strong> ";
+        const text = document.createElement("span");
+        p.appendChild(text);
+        body.appendChild(p);
+        streams[id] = text;
+      }
+      return streams[id];
+    };
+
+    socket.on("ai_response_chunk", (data) => {
+      streamTarget(data.id).textContent += data.chunk;
+      body.scrollTop = body.scrollHeight;
+    });
+
+    socket.on("ai_response_done", (data) => {
+      const text = streamTarget(data.id);
+      text.textContent = data.response;
+      text.parentElement.classList.remove("streaming");
+      delete streams[data.id];
+      body.scrollTop = body.scrollHeight;
+    });
+
+    // AI reply (non-streaming)
     socket.on("ai_response", (data) => {
       body.innerHTML += `
         <p class="ai-msg"><strong>AI:</strong> ${data.response}</p>
@@ -10,21 +10,25 @@ const LANGUAGES = {
   zh: "中文"
 };
 
+// One request per page: every data-i18n string goes to the batch endpoint
 async function translatePage(lang) {
   const elements = document.querySelectorAll("[data-i18n]");
+  const texts = [...new Set([...elements].map(el => el.getAttribute("data-i18n")))];
 
-  for (const el of elements) {
-    const key = el.getAttribute("data-i18n");
-
+  if (texts.length) {
     try {
-      const res = await fetch(`${API_URL}/api/translate`, {
+      const res = await fetch(`${API_URL}/api/translate/batch`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text: key, target: lang })
+        body: JSON.stringify({ texts, target: lang })
       });
 
       const data = await res.json();
-      el.innerHTML = data.translation || key;
+      const translations = data.translations || {};
+      elements.forEach(el => {
+        const key = el.getAttribute("data-i18n");
+        el.innerHTML = translations[key] || key;
+      });
 
     } catch (e) {
       console.warn("Translation failed:", e);
@@ -2,6 +2,7 @@
 const BOOKINGS = {
   socket: null,
   bookings: [],
+  nextCursor: null,
   API_URL: 'https://syedcohost.onrender.com',
 
   init() {
@@ -33,22 +34,32 @@ const BOOKINGS = {
     });
 
     this.socket.on('booking_cancelled', (id) => {
-      this.removeBooking(id);
+      const booking = this.bookings.find(b => b.id == id);
+      if (booking) this.updateBooking({ ...booking, status: 'cancelled' });
     });
   },
 
-  loadBookings() {
-    fetch(`${this.API_URL}/api/my-bookings`, {
+  loadBookings(cursor = null) {
+    const query = cursor ? `?cursor=${cursor}` : '';
+    fetch(`${this.API_URL}/api/my-bookings${query}`, {
       headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
     })
-    .then(r => r.json())
+    .then(r => {
+      if (!r.ok) throw new Error(r.status);
+      this.nextCursor = r.headers.get('X-Next-Cursor');
+      return r.json();
+    })
     .then(data => {
-      this.bookings = data;
+      this.bookings = cursor ? this.bookings.concat(data) : data;
       this.renderBookings();
     })
     .catch(() => this.showWidget('Failed to load bookings', 'error'));
   },
 
+  loadMore() {
+    if (this.nextCursor) this.loadBookings(this.nextCursor);
+  },
+
   renderBookings() {
     const container = document.getElementById('bookings-list');
     const empty = document.getElementById('empty-state');
@@ -78,7 +89,7 @@ const BOOKINGS = {
                 <i class="fas fa-times"></i> Cancel
               </button>
             ` : ''}
-            ${b.status === 'completed' ? `
+            ${b.status === 'completed' && !b.reviewed ? `
               <button class="btn-review" onclick="BOOKINGS.review('${b.id}')">
                 <i class="fas fa-star"></i> Review
               </button>
@@ -89,7 +100,9 @@ const BOOKINGS = {
           </div>
         </div>
       </div>
-    `).join('');
+    `).join('') + (this.nextCursor ? `
+      <button class="btn-load-more" onclick="BOOKINGS.loadMore()">Load older bookings</button>
+    ` : '');
   },
 
   cancel(id) {
@@ -99,7 +112,10 @@ const BOOKINGS = {
       method: 'POST',
       headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
     })
-    .then(() => this.showWidget('Cancelled', 'success'))
+    .then(r => {
+      if (!r.ok) throw new Error(r.status);
+      this.showWidget('Cancelled', 'success');
+    })
     .catch(() => this.showWidget('Cancel failed', 'error'));
   },
 
@@ -114,7 +130,13 @@ const BOOKINGS = {
           'Authorization': `Bearer ${localStorage.getItem('token')}`
         },
         body: JSON.stringify({ rating, comment })
-      });
+      })
+      .then(r => r.json().then(data => {
+        if (!r.ok) throw new Error(data.error);
+        this.updateBooking({ ...this.bookings.find(b => b.id == id), reviewed: true });
+        this.showWidget(data.message, 'success');
+      }))
+      .catch(e => this.showWidget(e.message || 'Review failed', 'error'));
     }
   },
 
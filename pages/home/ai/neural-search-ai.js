@@ -93,6 +93,7 @@ const NEURAL_SEARCH = {
 
     this.showStatus('AI is thinking...', 'thinking');
     document.getElementById('results').innerHTML = this.getLoadingHTML();
+    this.lastQuery = input;
 
     this.socket.emit('ai_search', {
       query: input,
@@ -102,11 +103,17 @@ const NEURAL_SEARCH = {
   },
 
   // === 4. HANDLE AI RESULTS ===
+  // Local results arrive first; an AI-reranked order may follow (stage: 'rerank')
   handleResults(data) {
+    if (data.query !== undefined && data.query !== this.lastQuery) return; // stale
+    if (data.stage === 'limited') {
+      return this.showStatus(`Too many searches — wait ${Math.ceil(data.retry_after)}s`, 'error');
+    }
     this.properties = data.properties || [];
     this.renderProperties();
     this.updateCount();
-    this.showStatus(`${this.properties.length} properties found`, 'success');
+    const label = data.stage === 'rerank' ? 'AI-ranked' : 'found';
+    this.showStatus(`${this.properties.length} properties ${label}`, 'success');
   },
 
   handleAIResponse(data) {
@@ -26,6 +26,7 @@ const HOST_DASHBOARD = {
     });
 
     this.socket.on('connect', () => {
+      this.socket.emit('dashboard_join', { token: localStorage.getItem('token') });
       this.showWidget('AI Dashboard Live', 'success');
     });
 
@@ -38,7 +39,14 @@ const HOST_DASHBOARD = {
     });
 
     this.socket.on('new_booking', (booking) => {
-      this.showNotification(`New booking: ${booking.guest} → $${booking.total}`);
+      const more = booking.count > 1 ? ` (+${booking.count - 1} more)` : '';
+      this.showNotification(`New booking: ${booking.guest} → $${booking.total}${more}`);
+    });
+
+    this.socket.on('listing_ready', (job) => {
+      if (job.status !== 'done') return;
+      const prop = job.result.property;
+      this.showNotification(`${prop.title} is live at $${prop.price}/night`);
     });
   },
 
@@ -54,7 +62,7 @@ const HOST_DASHBOARD = {
   updateStats(data) {
     this.stats = data;
     document.getElementById('bookings-count').textContent = data.bookings;
-    document.getElementById('revenue-total').textContent = `$${dataATEGORY.revenue.toLocaleString()}`;
+    document.getElementById('revenue-total').textContent = `$${data.revenue.toLocaleString()}`;
     document.getElementById('owner-profit').textContent = `$${data.profit.toLocaleString()}`;
   },
 
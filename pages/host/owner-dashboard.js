@@ -27,6 +27,7 @@ const OWNER_DASH = {
     });
 
     this.socket.on('connect', () => {
+      this.socket.emit('dashboard_join', { scope: 'platform' });
       this.showWidget('AI Empire Connected', 'success');
     });
 
@@ -27,6 +27,7 @@ const PROPERTY_OWNER = {
     });
 
     this.socket.on('connect', () => {
+      this.socket.emit('dashboard_join', { token: localStorage.getItem('token') });
       this.showWidget('AI Connected', 'success');
     });
 
@@ -4,8 +4,8 @@ const CURRENCY = {
   FALLBACK_RATES: { USD: 1, PKR: 278.5, EUR: 0.92, GBP: 0.79, AED: 3.67, SAR: 3.75, INR: 84 },
   SYMBOLS: { USD: '$', PKR: '₨', EUR: '€', GBP: '£', AED: 'د.إ', SAR: 'ر.س', INR: '₹' },
 
-  // Live API (free, reliable, no key)
-  API_URL: 'https://api.exchangerate-api.com/v4/latest/USD',
+  // Rates served (and cached) by our backend
+  API_URL: 'https://syedcohost.onrender.com/api/rates',
 
   baseUSD: 897, // 3 nights × $299
   rates: {},
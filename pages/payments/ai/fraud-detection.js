@@ -1,7 +1,7 @@
 // pages/payments/ai/fraud-detection.js — v9999.9 | AI FRAUD + TAX + CURRENCY
 const FRAUD = {
   API_URL: 'https://syedcohost.onrender.com',
-  CURRENCY_API: 'https://api.exchangerate-api.com/v4/latest/USD',
+  CURRENCY_API: 'https://syedcohost.onrender.com/api/rates',
   TAX_RATES: { gst: 0.17, income_tax: 0.05 },
 
   // AI Fraud Rules
@@ -36,22 +36,37 @@ const FRAUD = {
 
     this.showLoader('Processing with JazzCash...');
 
-    fetch(`${this.API_URL}/api/process-payment`, {
-      method: 'POST',
-      headers: { 
-        'Content-Type': 'application/json',
-        'Authorization': `Bearer ${localStorage.getItem('token') || ''}`
-      },
+    // One key per payment: "Try again" after a dropped connection resends the
+    // same request, so the server answers with the first result instead of
+    // processing the payment twice
+    this.pending = this.pending || {
+      key: crypto.randomUUID(),
       body: JSON.stringify({ 
         amount: amountUSD, 
         currency: 'USD',
         tax: taxData,
         fraudScore 
       })
+    };
+
+    fetch(`${this.API_URL}/api/process-payment`, {
+      method: 'POST',
+      headers: { 
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${localStorage.getItem('token') || ''}`,
+        'Idempotency-Key': this.pending.key
+      },
+      body: this.pending.body
     })
-    .then(r => r.json())
-    .then(d => {
+    .then(r => r.json().catch(() => ({})).then(d => ({ status: r.status, d })))
+    .then(({ status, d }) => {
       this.hideLoader();
+      // 409 (first attempt still running), 429 and 5xx settle nothing: keep
+      // the key so "Try again" resends the same payment. Anything else is
+      // the answer, and the next payment is a new one.
+      if (status !== 409 && status !== 429 && status < 500) {
+        this.pending = null;
+      }
       if (d.success) {
         this.showSuccess(d, totalPKR);
       } else {
@@ -1,7 +1,7 @@
 // pages/payments/ai/wu-to-jc.js — v9999.9 | WU → JAZZCASH | AI FRAUD + TAX + CURRENCY
 const WU = {
   API_URL: 'https://syedcohost.onrender.com',
-  CURRENCY_API: 'https://api.exchangerate-api.com/v4/latest/USD',
+  CURRENCY_API: 'https://syedcohost.onrender.com/api/rates',
   TAX_RATES: { gst: 0.17, income_tax: 0.05 },
 
   // AI Fraud Rules
@@ -125,7 +125,7 @@ const PROPERTY = {
 
   async loadLiveRates() {
     try {
-      const res = await fetch('https://api.exchangerate-api.com/v4/latest/USD');
+      const res = await fetch('https://syedcohost.onrender.com/api/rates');
       const data = await res.json();
       Object.keys(this.RATES).forEach(curr => {
         if (data.rates[curr]) this.RATES[curr] = data.rates[curr];
@@ -1,5 +1,62 @@
-from api.server import app, socketio
+# run.py — start the API
+#
+#   python run.py                one process (eventlet)
+#   python run.py --workers 4    gunicorn with 4 eventlet workers on one port
+#                                (default: $WEB_CONCURRENCY, else 1)
+#
+# Several workers need two things, which the launcher sets up by default:
+#   1. A message queue, so an emit in one worker reaches sockets held by
+#      another: SOCKETIO_MESSAGE_QUEUE=sqlite:// (workers on one host) or
+#      redis://host:6379/0 (several hosts; needs the `redis` package).
+#   2. Every Socket.IO client staying on one worker. Long-polling sends each
+#      poll as a new HTTP request, which the kernel may hand to any worker,
+#      so without a sticky load balancer (e.g. nginx `ip_hash`, or one port
+#      per worker behind it) only WebSocket is safe. Socket.IO is therefore
+#      limited to websocket unless STICKY_SESSIONS=1.
+# Jobs, rate limits and idempotency keys also move to SQLite so all workers
+# share them.
+import argparse
+import os
+import sys
+
+
+def multi_worker_env():
+    if not (os.getenv("SECRET_KEY") or os.getenv("SECRET_KEYS")):
+        sys.exit("SECRET_KEY (or SECRET_KEYS) must be set: every worker has to sign tokens with the same key")
+    os.environ.setdefault("SOCKETIO_MESSAGE_QUEUE", "sqlite://")
+    if os.getenv("STICKY_SESSIONS") != "1":
+        os.environ.setdefault("SOCKETIO_TRANSPORTS", "websocket")
+    os.environ.setdefault("JOBS_DURABLE", "1")
+    os.environ.setdefault("RATE_LIMIT_STORE", "sqlite")
+    os.environ.setdefault("IDEMPOTENCY_STORE", "sqlite")
+
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Start the SYED CO-HOST API")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 5000)))
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        multi_worker_env()
+        print(f"SYED CO-HOST AI v9999.9 — {args.workers} workers, queue {os.environ['SOCKETIO_MESSAGE_QUEUE']}")
+        os.execv(sys.executable, [
+            sys.executable, "-m", "gunicorn", "-k", "eventlet", "-w", str(args.workers),
+            "-b", f"0.0.0.0:{args.port}", "--timeout", "120", "run:app",
+        ])
+
+    import eventlet
+    eventlet.monkey_patch()  # before the app imports anything that blocks
+
+    from api.server import create_app, socketio
+
     print("SYED CO-HOST AI v9999.9 — LIVE")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    socketio.run(create_app(), host='0.0.0.0', port=args.port, debug=False)
+else:
+    # gunicorn run:app — the eventlet worker has already monkey-patched
+    from api.server import create_app
+
+    app = create_app()